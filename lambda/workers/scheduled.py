@@ -2,12 +2,22 @@
 Lambda handler for scheduled scans
 Triggered by EventBridge on a schedule
 """
+import sys
+import os
 import json
 import boto3
 from datetime import datetime
 
+# Add parent directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from scanners.regions import resolve_regions
+
 sqs = boto3.client('sqs')
 
+# SageMaker scans fan out per region; IAM and S3 are account-wide
+REGIONAL_SCAN_TYPES = {'sagemaker'}
+
 def lambda_handler(event, context):
     """Trigger daily governance scans"""
     
@@ -15,10 +25,14 @@ def lambda_handler(event, context):
     
     # Queue scan jobs
     scan_types = ['s3', 'sagemaker', 'iam']
-    regions = ['us-east-1']  # Add more regions as needed
+    home_region = os.environ.get('AWS_REGION', 'us-east-1')
+    # SCAN_REGIONS defaults to the home region; deployments opt in to 'all'
+    # (every enabled region) or a comma-separated list
+    regions = resolve_regions(os.environ.get('SCAN_REGIONS'), home_region)
+    scans_queued = 0
     
     for scan_type in scan_types:
-        for region in regions:
+        for region in (regions if scan_type in REGIONAL_SCAN_TYPES else [home_region]):
             message = {
                 'scan_type': scan_type,
                 'region': region,
@@ -31,12 +45,14 @@ def lambda_handler(event, context):
                 MessageBody=json.dumps(message)
             )
             
+            scans_queued += 1
             print(f"Queued {scan_type} scan for {region}")
     
     return {
         'statusCode': 200,
         'body': json.dumps({
             'message': 'Scans queued successfully',
-            'scans_queued': len(scan_types) * len(regions)
+            'scans_queued': scans_queued,
+            'regions': regions
         })
     }
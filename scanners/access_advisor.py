@@ -0,0 +1,149 @@
+"""
+Service Last Accessed Orchestrator
+Runs IAM GenerateServiceLastAccessedDetails jobs for many roles in batches,
+polling with backoff and caching completed results for a TTL
+"""
+
+import random
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+# State store key for cached results, and how long they stay fresh (seconds)
+SERVICE_LAST_ACCESSED_STATE_KEY = 'iam-service-last-accessed'
+DEFAULT_TTL = 24 * 3600
+
+
+class ServiceLastAccessedOrchestrator:
+    """Submits service-last-accessed jobs in batches and collects per-role service usage
+    
+    batch_size bounds the jobs in flight; max_wait bounds each job's polling (seconds).
+    """
+    
+    def __init__(self, iam_client, state_store=None, batch_size: int = 20,
+                 ttl_seconds: int = DEFAULT_TTL, max_wait: float = 300.0):
+        self.iam = iam_client
+        self.state_store = state_store
+        self.batch_size = max(1, batch_size)
+        self.ttl_seconds = ttl_seconds
+        self.max_wait = max_wait
+        self.stats = {'cached': 0, 'jobs_submitted': 0, 'jobs_failed': 0, 'polls': 0}
+    
+    def fetch(self, role_arns: List[str]) -> Dict[str, List[Dict]]:
+        """Get each role's services as {'namespace', 'last_authenticated'} entries (ISO time or None)"""
+        cache = self._load_cache()
+        now = time.time()
+        results = {}
+        pending = []
+        for arn in role_arns:
+            entry = cache.get(arn)
+            if entry and now - entry['fetched_at'] < self.ttl_seconds:
+                results[arn] = entry['services']
+                self.stats['cached'] += 1
+            else:
+                pending.append(arn)
+        
+        for arn, services in self._run_jobs(pending).items():
+            results[arn] = services
+            cache[arn] = {'fetched_at': time.time(), 'services': services}
+        
+        if pending:
+            self._save_cache(cache)
+        return results
+    
+    def _run_jobs(self, role_arns: List[str]) -> Dict[str, List[Dict]]:
+        """Run jobs with at most batch_size in flight, polling each with exponential backoff"""
+        # Jobs run asynchronously on the IAM side, so a new one is submitted
+        # as soon as a slot frees up rather than after the whole batch
+        queue = list(role_arns)
+        jobs: Dict[str, Dict] = {}
+        results = {}
+        while queue or jobs:
+            while queue and len(jobs) < self.batch_size:
+                arn = queue.pop(0)
+                try:
+                    response = self.iam.generate_service_last_accessed_details(Arn=arn, Granularity='SERVICE_LEVEL')
+                except Exception as e:
+                    print(f"[!] Error starting service last accessed job for {arn}: {e}")
+                    continue
+                self.stats['jobs_submitted'] += 1
+                now = time.monotonic()
+                jobs[response['JobId']] = {'arn': arn, 'delay': 1.0, 'next_poll': now + 1.0, 'deadline': now + self.max_wait}
+            if not jobs:
+                continue
+            
+            time.sleep(max(0.0, min(job['next_poll'] for job in jobs.values()) - time.monotonic()))
+            for job_id, job in list(jobs.items()):
+                now = time.monotonic()
+                if job['next_poll'] > now:
+                    continue
+                try:
+                    services = self._get_job_results(job_id)
+                except Exception as e:
+                    print(f"[!] Service last accessed job failed for {job['arn']}: {e}")
+                    self.stats['jobs_failed'] += 1
+                    del jobs[job_id]
+                    continue
+                
+                if services is not None:
+                    results[job['arn']] = services
+                    del jobs[job_id]
+                elif now >= job['deadline']:
+                    print(f"[!] Timed out waiting for service last accessed job for {job['arn']}")
+                    self.stats['jobs_failed'] += 1
+                    del jobs[job_id]
+                else:
+                    job['delay'] = min(10.0, job['delay'] * 2)
+                    job['next_poll'] = now + job['delay'] * random.uniform(0.8, 1.2)
+        return results
+    
+    def _get_job_results(self, job_id: str) -> Optional[List[Dict]]:
+        """Get a finished job's services, None while it is still running"""
+        self.stats['polls'] += 1
+        response = self.iam.get_service_last_accessed_details(JobId=job_id)
+        if response['JobStatus'] == 'IN_PROGRESS':
+            return None
+        if response['JobStatus'] == 'FAILED':
+            raise RuntimeError(response.get('Error', {}).get('Message', 'job failed'))
+        
+        services = self._normalize(response['ServicesLastAccessed'])
+        while response.get('IsTruncated'):
+            response = self.iam.get_service_last_accessed_details(JobId=job_id, Marker=response['Marker'])
+            services += self._normalize(response['ServicesLastAccessed'])
+        return services
+    
+    def _normalize(self, entries: List[Dict]) -> List[Dict]:
+        """Reduce service entries to namespace and last authenticated time"""
+        return [
+            {
+                'namespace': entry['ServiceNamespace'],
+                'last_authenticated': (
+                    entry['LastAuthenticated'].isoformat()
+                    if isinstance(entry.get('LastAuthenticated'), datetime)
+                    else entry.get('LastAuthenticated')
+                )
+            }
+            for entry in entries
+        ]
+    
+    def _load_cache(self) -> Dict[str, Dict]:
+        """Load cached results from the state store"""
+        if not self.state_store:
+            return {}
+        try:
+            return (self.state_store.get(SERVICE_LAST_ACCESSED_STATE_KEY) or {}).get('roles', {})
+        except Exception as e:
+            print(f"[!] Error loading service last accessed cache: {e}")
+            return {}
+    
+    def _save_cache(self, cache: Dict[str, Dict]) -> None:
+        """Save results to the state store, dropping expired entries"""
+        if not self.state_store:
+            return
+        now = time.time()
+        fresh = {arn: entry for arn, entry in cache.items() if now - entry['fetched_at'] < self.ttl_seconds}
+        try:
+            self.state_store.put(SERVICE_LAST_ACCESSED_STATE_KEY, {'roles': fresh}, ttl_seconds=self.ttl_seconds)
+        except Exception as e:
+            print(f"[!] Error saving service last accessed cache: {e}")
@@ -0,0 +1,253 @@
+"""
+Access Graph
+In-memory index of principal -> policy -> action pattern -> resource pattern edges,
+built from IAM and S3 scan results and answering blast-radius queries offline
+"""
+
+import argparse
+import gzip
+import json
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .iam_evaluator import IndexedStatement, RolePermissions, arn_service
+from .policy_index import CompiledStatement, compile_policy, policy_hash
+
+
+class AccessGraph:
+    """Adjacency index for "which roles can reach this resource" queries"""
+    
+    def __init__(self):
+        # Role ARN -> role name, and role ARN -> attached policy ids
+        self.principals: Dict[str, str] = {}
+        self.role_policies: Dict[str, List[str]] = {}
+        # Policy id (ARN or role/inline name) -> content hash; identical documents share grants
+        self.policies: Dict[str, str] = {}
+        # Content hash -> grants, each one statement's effect, action and resource patterns
+        self.grants: Dict[str, List[Dict]] = {}
+        # Resource ARN -> type and attributes of resources seen by the scanners
+        self.resources: Dict[str, Dict] = {}
+        # Reverse lookups and the service index are rebuilt lazily after changes:
+        # role ARN -> the content hashes of its policies, and each such set -> its roles
+        self._role_digests: Dict[str, Tuple[str, ...]] = {}
+        self._digest_set_roles: Dict[Tuple[str, ...], List[str]] = {}
+        self._digest_sets: Dict[str, Set[Tuple[str, ...]]] = {}
+        # Content hash -> the grants as compiled statements, shared by every policy with that document
+        self._statements: Dict[str, List[CompiledStatement]] = {}
+        # A set of documents -> all of their statements, built on first query and shared
+        # by the roles stamped from the same policies
+        self._permissions: Dict[Tuple[str, ...], RolePermissions] = {}
+        self._by_service: Optional[Dict[str, List[str]]] = None
+    
+    def add_role(self, role_arn: str, role_name: str, policies: Iterable[tuple]) -> None:
+        """Add a role and its (policy name or ARN, document) pairs"""
+        self.principals[role_arn] = role_name
+        policy_ids = []
+        for policy_name, document in policies:
+            # Managed policies are shared by ARN; inline ones belong to the role
+            policy_id = policy_name if policy_name.startswith('arn:') else f"{role_arn}/inline/{policy_name}"
+            digest = policy_hash(document)
+            self.policies[policy_id] = digest
+            if digest not in self.grants:
+                self.grants[digest] = [
+                    {
+                        'effect': statement.effect,
+                        'actions': list(statement.actions),
+                        'not_actions': list(statement.not_actions),
+                        'resources': list(statement.resources),
+                        'not_resources': list(statement.not_resources),
+                        'conditional': statement.has_condition
+                    }
+                    for statement in compile_policy(document)
+                ]
+            policy_ids.append(policy_id)
+        self.role_policies[role_arn] = policy_ids
+        self._by_service = None
+    
+    def add_resource(self, resource_arn: str, resource_type: str, **attributes) -> None:
+        """Add a resource that queries can enumerate"""
+        self.resources[resource_arn] = {'type': resource_type, **attributes}
+    
+    def who_can_reach(self, resource_arn: str, action: Optional[str] = None) -> List[Dict]:
+        """Get the roles whose policies allow an action (or any action of the resource's service) on a resource
+        
+        Each candidate role's statements from every attached policy are evaluated together
+        with RolePermissions.reach(), so a Deny in one policy applies to an Allow from another.
+        Condition blocks aren't evaluated, so conditional paths are flagged rather than dropped.
+        """
+        service = action.split(':', 1)[0].lower() if action else arn_service(resource_arn)
+        index = self._get_index()
+        
+        # Only roles with a document naming the service (or any service) can be allowed, and
+        # roles with the same set of documents share one decision
+        decisions = {}
+        for digest in index.get(service, []) + index.get('*', []):
+            for digests in self._digest_sets.get(digest, ()):
+                if digests not in decisions:
+                    decisions[digests] = self._set_permissions(digests).reach(resource_arn, action)
+        
+        matches = []
+        for role_arn in sorted(
+            role_arn for digests, decision in decisions.items() if decision.allowed
+            for role_arn in self._digest_set_roles[digests]
+        ):
+            decision = decisions[self._role_digests[role_arn]]
+            paths = []
+            for indexed, policy_id in (
+                (indexed, policy_id) for indexed in decision.statements
+                for policy_id in self.role_policies[role_arn] if self.policies[policy_id] == indexed.policy
+            ):
+                statement = indexed.statement
+                path = {
+                    'policy': policy_id,
+                    'actions': list(statement.actions) or [f"NotAction:{a}" for a in statement.not_actions],
+                    'resources': list(statement.resources) or [f"NotResource:{r}" for r in statement.not_resources],
+                    # A conditional Deny anywhere on the role makes every path conditional
+                    'conditional': statement.has_condition or decision.conditional
+                }
+                # Statements differing only in their conditions give the same path
+                if path not in paths:
+                    paths.append(path)
+            matches.append({
+                'role_arn': role_arn,
+                'role_name': self.principals[role_arn],
+                'conditional': decision.conditional,
+                'paths': paths
+            })
+        return matches
+    
+    def reachable_resources(self, role: str, action: Optional[str] = None) -> List[str]:
+        """Get the known resources a role (name or ARN) can reach"""
+        role_arn = role if role in self.principals else next(
+            (arn for arn, name in self.principals.items() if name == role), None
+        )
+        if role_arn is None:
+            raise KeyError(f"Unknown role: {role}")
+        return [
+            resource_arn for resource_arn in sorted(self.resources)
+            if any(match['role_arn'] == role_arn for match in self.who_can_reach(resource_arn, action))
+        ]
+    
+    def stats(self) -> Dict[str, int]:
+        """Count nodes and edges"""
+        grant_edges = sum(
+            max(1, len(g['actions'] or g['not_actions'])) * max(1, len(g['resources'] or g['not_resources']))
+            for digest in self.policies.values() for g in self.grants[digest]
+        )
+        return {
+            'principals': len(self.principals),
+            'policies': len(self.policies),
+            'distinct_policy_documents': len(self.grants),
+            'resources': len(self.resources),
+            'edges': sum(len(ids) for ids in self.role_policies.values()) + grant_edges
+        }
+    
+    def save(self, path: str) -> None:
+        """Write the graph as JSON (gzipped if the path ends in .gz)"""
+        data = {
+            'principals': self.principals,
+            'role_policies': self.role_policies,
+            'policies': self.policies,
+            'grants': self.grants,
+            'resources': self.resources
+        }
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'wt') as f:
+            json.dump(data, f, default=str)
+        print(f"[+] Access graph exported to {path}")
+    
+    @classmethod
+    def load(cls, path: str) -> 'AccessGraph':
+        """Read a graph written by save()"""
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt') as f:
+            data = json.load(f)
+        graph = cls()
+        for key in ('principals', 'role_policies', 'policies', 'grants', 'resources'):
+            setattr(graph, key, data[key])
+        return graph
+    
+    def _get_index(self) -> Dict[str, List[str]]:
+        """Index policy documents by the services their statements name ('*' for any service)"""
+        if self._by_service is None:
+            self._role_digests = {}
+            self._digest_set_roles = {}
+            self._digest_sets = {}
+            for role_arn, policy_ids in self.role_policies.items():
+                digests = tuple(sorted({self.policies[policy_id] for policy_id in policy_ids}))
+                self._role_digests[role_arn] = digests
+                self._digest_set_roles.setdefault(digests, []).append(role_arn)
+                for digest in digests:
+                    self._digest_sets.setdefault(digest, set()).add(digests)
+            
+            self._statements = {}
+            self._permissions = {}
+            self._by_service = {}
+            for digest, grants in self.grants.items():
+                statements = self._statements[digest] = [_grant_statement(grant) for grant in grants]
+                services = RolePermissions.from_statements(
+                    IndexedStatement(digest, statement) for statement in statements
+                ).services()
+                for service in services:
+                    self._by_service.setdefault(service, []).append(digest)
+        return self._by_service
+    
+    def _set_permissions(self, digests: Tuple[str, ...]) -> RolePermissions:
+        """Get every statement of a set of documents together, each tagged with its document's hash"""
+        permissions = self._permissions.get(digests)
+        if permissions is None:
+            permissions = self._permissions[digests] = RolePermissions.from_statements(
+                IndexedStatement(digest, statement) for digest in digests for statement in self._statements[digest]
+            )
+        return permissions
+
+
+def _grant_statement(grant: Dict) -> CompiledStatement:
+    """Rebuild the compiled statement a stored grant came from"""
+    return CompiledStatement(
+        effect=grant['effect'],
+        actions=tuple(grant['actions']),
+        not_actions=tuple(grant['not_actions']),
+        resources=tuple(grant['resources']),
+        not_resources=tuple(grant['not_resources']),
+        has_condition=grant['conditional']
+    )
+
+
+def main():
+    """Query a saved access graph"""
+    parser = argparse.ArgumentParser(
+        description='Answer blast-radius queries from a saved access graph (no AWS calls)'
+    )
+    parser.add_argument('graph', help='Graph file written by a scan (.json or .json.gz)')
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument('--resource', help='Resource ARN: list the roles that can reach it')
+    query.add_argument('--role', help='Role name or ARN: list the known resources it can reach')
+    query.add_argument('--stats', action='store_true', help='Print graph size')
+    parser.add_argument('--action', help='Only consider this action, e.g. s3:GetObject')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    
+    args = parser.parse_args()
+    graph = AccessGraph.load(args.graph)
+    
+    if args.stats:
+        result = graph.stats()
+    elif args.resource:
+        result = graph.who_can_reach(args.resource, args.action)
+    else:
+        result = graph.reachable_resources(args.role, args.action)
+    
+    if args.json or args.stats:
+        print(json.dumps(result, indent=2))
+    elif args.resource:
+        for match in result:
+            flag = ' (conditional)' if match['conditional'] else ''
+            print(f"{match['role_name']}{flag}")
+            for path in match['paths']:
+                print(f"  via {path['policy']}: {', '.join(path['actions'])} on {', '.join(path['resources'])}")
+    else:
+        for resource_arn in result:
+            print(resource_arn)
+
+
+if __name__ == '__main__':
+    main()
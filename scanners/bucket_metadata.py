@@ -0,0 +1,47 @@
+"""
+S3 Bucket Metadata Cache
+Scan-scoped cache so each bucket attribute is fetched from S3 at most once
+"""
+
+from typing import Callable, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+from .concurrency import Memo
+
+
+# attribute -> (client method, error code meaning "not configured")
+BUCKET_ATTRIBUTES = {
+    'tagging': ('get_bucket_tagging', 'NoSuchTagSet'),
+    'encryption': ('get_bucket_encryption', 'ServerSideEncryptionConfigurationNotFoundError'),
+    'versioning': ('get_bucket_versioning', None),
+    'lifecycle': ('get_bucket_lifecycle_configuration', 'NoSuchLifecycleConfiguration'),
+    'public_access_block': ('get_public_access_block', 'NoSuchPublicAccessBlockConfiguration'),
+}
+
+
+class BucketMetadataCache:
+    """Caches bucket API responses for the lifetime of one scan"""
+    
+    def __init__(self, client_for: Callable[[Optional[str]], object]):
+        self.client_for = client_for
+        # Keyed by (bucket, attribute); concurrent lookups of a key share one fetch
+        self._memo = Memo()
+    
+    def get(self, bucket_name: str, attribute: str, region: Optional[str] = None) -> Optional[Dict]:
+        """Get a bucket attribute, or None when it is not configured (other errors are re-raised)"""
+        return self._memo.get((bucket_name, attribute), lambda: self._fetch(bucket_name, attribute, region))
+    
+    def _fetch(self, bucket_name: str, attribute: str, region: Optional[str]) -> Optional[Dict]:
+        """Call S3 for a single bucket attribute"""
+        method, missing_code = BUCKET_ATTRIBUTES[attribute]
+        try:
+            return getattr(self.client_for(region), method)(Bucket=bucket_name)
+        except ClientError as e:
+            if missing_code and e.response.get('Error', {}).get('Code') == missing_code:
+                return None
+            raise
+    
+    def stats(self) -> Dict[str, float]:
+        """Get hit/miss counters"""
+        return self._memo.stats()
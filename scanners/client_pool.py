@@ -0,0 +1,38 @@
+"""
+Regional boto3 client pool
+Lazily creates one client per region so calls go straight to the resource's region
+"""
+
+import threading
+from typing import Callable, Dict, Optional
+
+import boto3
+from botocore.config import Config
+
+
+class ClientPool:
+    """Thread-safe pool of per-region clients for a single AWS service"""
+    
+    def __init__(self, service: str, default_region: str = 'us-east-1', config: Optional[Config] = None,
+                 before_call: Optional[Callable] = None):
+        self.service = service
+        self.default_region = default_region
+        self.config = config
+        # Optional botocore before-call handler registered on every client, e.g. to count calls
+        self.before_call = before_call
+        self._clients: Dict[str, object] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, region: Optional[str] = None):
+        """Get the client for a region, creating it on first use"""
+        region = region or self.default_region
+        client = self._clients.get(region)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(region)
+                if client is None:
+                    client = boto3.client(self.service, region_name=region, config=self.config)
+                    if self.before_call:
+                        client.meta.events.register('before-call', self.before_call)
+                    self._clients[region] = client
+        return client
@@ -0,0 +1,215 @@
+"""
+Concurrency helpers shared by the scanners
+Bounded worker pools that keep results in a deterministic order
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def run_ordered(func: Callable[[T], R], items: Iterable[T], max_workers: int = 1) -> List[R]:
+    """Apply func to every item on a bounded thread pool, returning results in input order"""
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+def iter_ordered(func: Callable[[T], R], items: Iterable[T], max_workers: int = 1) -> Iterator[R]:
+    """Like run_ordered, but lazy: yields each result once it and every earlier one are done"""
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    
+    # At most two tasks per worker are queued ahead of the consumer
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        window = deque()
+        for item in items:
+            window.append(pool.submit(func, item))
+            if len(window) >= max_workers * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def iter_as_completed(streams: Dict[Hashable, Iterator[T]], buffer_size: int = 1000) -> Iterator[Tuple[Hashable, T]]:
+    """Drain each iterator on its own thread, yielding (key, item) pairs as items arrive
+    
+    The streams share one buffer of at most buffer_size items, so producers that are
+    ahead of the consumer wait instead of growing memory. An error raised by a
+    stream is re-raised as soon as the consumer reaches it. If the consumer stops
+    early or raises, the producers stop at their next item.
+    """
+    done = object()
+    buffer: queue.Queue = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+    
+    def put(entry: Tuple) -> bool:
+        """Put an entry, giving up once the consumer has gone"""
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def drain(key: Hashable, stream: Iterator[T]) -> None:
+        try:
+            for item in stream:
+                if not put((key, item, None)):
+                    # Let an abandoned generator run its cleanup
+                    if hasattr(stream, 'close'):
+                        stream.close()
+                    return
+        except BaseException as e:
+            put((key, done, e))
+            return
+        put((key, done, None))
+    
+    # Daemon threads, so an abandoned consumer can't keep the process alive
+    for key, stream in streams.items():
+        threading.Thread(target=drain, args=(key, stream), daemon=True).start()
+    
+    try:
+        remaining = len(streams)
+        while remaining:
+            key, item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is done:
+                remaining -= 1
+                continue
+            yield key, item
+    finally:
+        stop.set()
+
+
+class FindingSink:
+    """Thread-safe sink that appends findings from concurrent producers to a shared list"""
+    
+    def __init__(self, target: List):
+        self.target = target
+        self._lock = threading.Lock()
+    
+    def extend(self, findings: Iterable) -> None:
+        """Append a batch of findings"""
+        findings = list(findings)
+        with self._lock:
+            self.target.extend(findings)
+
+
+class Memo:
+    """Thread-safe memo where concurrent lookups of a key share a single computation"""
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, compute: Callable[[], R]) -> R:
+        """Get the value for key, computing it on first use (errors are cached and re-raised)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = Future()
+                self._entries[key] = entry
+                self.misses += 1
+                owner = True
+            else:
+                self.hits += 1
+                owner = False
+        
+        if owner:
+            try:
+                entry.set_result(compute())
+            except Exception as e:
+                entry.set_exception(e)
+        return entry.result()
+    
+    def seed(self, key: Hashable, value) -> None:
+        """Preload a value, e.g. from a persistent store"""
+        entry = Future()
+        entry.set_result(value)
+        with self._lock:
+            self._entries.setdefault(key, entry)
+    
+    def values(self) -> Dict:
+        """Get every successfully computed value"""
+        with self._lock:
+            entries = dict(self._entries)
+        return {
+            key: entry.result() for key, entry in entries.items()
+            if entry.done() and entry.exception() is None
+        }
+    
+    def stats(self) -> Dict[str, float]:
+        """Get hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class TokenBucket:
+    """Rate limiter shared by threads: refills at rate tokens/sec up to burst"""
+    
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive: {rate}")
+        self.rate = rate
+        # Whole tokens are taken, so the bucket must hold at least one even below 1/sec
+        self.capacity = max(1.0, burst or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Wait for and take one token"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ProgressMeter:
+    """Thread-safe progress counter that reports items/sec"""
+    
+    def __init__(self, total: int, label: str, every: int = 50):
+        self.total = total
+        self.label = label
+        self.every = every
+        self.done = 0
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def tick(self) -> None:
+        """Count one finished item, printing progress every few items and at the end"""
+        with self._lock:
+            self.done += 1
+            if self.done % self.every == 0 or self.done == self.total:
+                print(f"[*] {self.done}/{self.total} {self.label} ({self.rate():.1f} {self.label}/sec)")
+    
+    def rate(self) -> float:
+        """Items per second so far"""
+        elapsed = time.monotonic() - self._start
+        return self.done / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,194 @@
+"""
+Describe Engine
+Runs list/describe API calls on a bounded pool with per-API adaptive concurrency:
+the limit halves when an API throttles and creeps back up as calls succeed
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError
+)
+
+
+THROTTLING_ERROR_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'SlowDown'
+}
+
+TRANSIENT_ERROR_CODES = {
+    'InternalFailure',
+    'InternalServerError',
+    'ServiceUnavailable'
+}
+
+# The clients run with botocore retries off, so dropped and timed-out connections
+# are retried here alongside the transient service errors
+CONNECTION_ERRORS = (
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError
+)
+
+
+class AdaptiveLimit:
+    """Additive-increase/multiplicative-decrease concurrency limit for one API"""
+    
+    def __init__(self, maximum: int, minimum: int = 1):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = float(maximum)
+        self._active = 0
+        self._cond = threading.Condition()
+    
+    def acquire(self) -> None:
+        """Wait for a free slot under the current limit"""
+        with self._cond:
+            while self._active >= int(self.limit):
+                self._cond.wait()
+            self._active += 1
+    
+    def release(self, succeeded: bool = True, throttled: bool = False) -> None:
+        """Free a slot, halving the limit on a throttle and growing it only after a success"""
+        with self._cond:
+            self._active -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit / 2)
+            elif succeeded:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class ApiStats:
+    """Call count, throttle count and latencies for one API"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.throttles = 0
+        self.latencies: List[float] = []
+        self._lock = threading.Lock()
+    
+    def record(self, latency: float, throttled: bool) -> None:
+        """Record a single call"""
+        with self._lock:
+            self.calls += 1
+            self.throttles += int(throttled)
+            self.latencies.append(latency)
+    
+    def to_dict(self) -> Dict:
+        """Summarise as call/throttle counts and p95 latency"""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+            return {
+                'calls': self.calls,
+                'throttles': self.throttles,
+                'p95_latency_ms': round(p95 * 1000, 1)
+            }
+
+
+class DescribeEngine:
+    """Bounded pool for list/describe calls with adaptive per-API concurrency"""
+    
+    def __init__(self, max_workers: int = 1, max_retries: int = 5):
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.limits: Dict[str, AdaptiveLimit] = {}
+        self.stats: Dict[str, ApiStats] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def call(self, api_name: str, func: Callable, **kwargs):
+        """Call an API under its adaptive limit, retrying throttled, transient and connection errors with backoff"""
+        limit, stats = self._get_api(api_name)
+        attempt = 0
+        while True:
+            limit.acquire()
+            start = time.monotonic()
+            succeeded = throttled = False
+            try:
+                result = func(**kwargs)
+                succeeded = True
+                return result
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code', '')
+                throttled = code in THROTTLING_ERROR_CODES
+                if attempt >= self.max_retries or not (throttled or code in TRANSIENT_ERROR_CODES):
+                    raise
+            except CONNECTION_ERRORS:
+                if attempt >= self.max_retries:
+                    raise
+            finally:
+                stats.record(time.monotonic() - start, throttled)
+                limit.release(succeeded, throttled)
+            
+            time.sleep(min(10.0, 0.2 * 2 ** attempt) * random.uniform(0.5, 1.0))
+            attempt += 1
+    
+    def paginate(self, api_name: str, func: Callable, result_key: str, **kwargs) -> Iterator[Dict]:
+        """Yield items from a NextToken-paginated list API, fetching each page through call()"""
+        while True:
+            page = self.call(api_name, func, **kwargs)
+            yield from page.get(result_key, [])
+            if not page.get('NextToken'):
+                return
+            kwargs['NextToken'] = page['NextToken']
+    
+    def map(self, func: Callable, items: Iterable) -> Iterator:
+        """Apply func to items on the pool, yielding results in input order"""
+        # Items are pulled lazily, so a paginated listing overlaps with the
+        # describe calls for the items it has already produced
+        if self.max_workers <= 1:
+            for item in items:
+                yield func(item)
+            return
+        
+        pool = self._get_pool()
+        window = deque()
+        for item in items:
+            window.append(pool.submit(func, item))
+            if len(window) >= self.max_workers * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+    
+    def shutdown(self) -> None:
+        """Stop the worker pool (it is recreated on next use)"""
+        with self._lock:
+            if self._pool:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+    
+    def get_stats(self) -> Dict[str, Dict]:
+        """Get per-API stats"""
+        return {api_name: stats.to_dict() for api_name, stats in sorted(self.stats.items())}
+    
+    def _get_api(self, api_name: str):
+        """Get the limit and stats for an API, creating them on first use"""
+        with self._lock:
+            if api_name not in self.limits:
+                self.limits[api_name] = AdaptiveLimit(self.max_workers)
+                self.stats[api_name] = ApiStats()
+            return self.limits[api_name], self.stats[api_name]
+    
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Get the worker pool, creating it on first use"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._pool
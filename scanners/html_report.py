@@ -0,0 +1,245 @@
+"""
+HTML Report
+Renders the scan report from a template compiled once at import, writing it to
+the output file in chunks; every finding is embedded and paginated client-side
+"""
+
+import html
+import json
+from string import Template
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Findings written to the file per write() call
+DEFAULT_CHUNK_SIZE = 1000
+
+# Rows shown per page in each scanner's table
+PAGE_SIZE = 50
+
+SEVERITIES = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW']
+
+# The page splits at the FINDINGS marker: the head and tail are filled in once,
+# and the findings stream between them as JSON rows
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>$title</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 20px; }
+        h1 { color: #232f3e; }
+        h2 { color: #ff9900; }
+        .summary { background: #f0f0f0; padding: 15px; border-radius: 5px; }
+        .critical { color: #d13212; font-weight: bold; }
+        .high { color: #ff9900; font-weight: bold; }
+        .medium { color: #1d8102; }
+        .low { color: #879596; }
+        table { border-collapse: collapse; width: 100%; margin: 20px 0; }
+        th, td { border: 1px solid #ddd; padding: 12px; text-align: left; }
+        th { background-color: #232f3e; color: white; }
+        tr:nth-child(even) { background-color: #f9f9f9; }
+        .risk-score { font-size: 48px; font-weight: bold; }
+        .badge { display: inline-block; padding: 5px 10px; border-radius: 3px; color: white; }
+        .badge-all { background-color: #0073bb; }
+        .pager button { margin: 0 5px; }
+    </style>
+</head>
+<body>
+    <h1>AWS AI Governance Framework - Security Scan Report</h1>
+$badge
+    <div class="summary">
+        <h2>Executive Summary</h2>
+        <p><strong>Scan Date:</strong> $timestamp</p>
+        <p><strong>Region:</strong> $region</p>
+        <p><strong>SageMaker Regions:</strong> $regions</p>
+$scan_mode
+        <p><strong>Total Findings:</strong> $total_findings</p>
+        <p><strong>Risk Score:</strong> <span class="risk-score">$risk_score/100</span></p>
+    </div>
+    
+    <h2>Severity Breakdown</h2>
+    <table>
+        <tr>
+            <th>Severity</th>
+            <th>Count</th>
+        </tr>
+$severity_rows
+    </table>
+    
+    <h2>Top Violated Controls</h2>
+    <table>
+        <tr>
+            <th>Control</th>
+            <th>Violations</th>
+        </tr>
+$control_rows
+    </table>
+    
+    <h2>Detailed Findings</h2>
+    <div id="findings"></div>
+    <script type="application/json" id="findings-data">[<!--FINDINGS-->]</script>
+    <script type="application/json" id="findings-lookups">$lookups</script>
+    <script>
+    (function () {
+        var PAGE_SIZE = $page_size;
+        var rows = JSON.parse(document.getElementById('findings-data').textContent);
+        var lookups = JSON.parse(document.getElementById('findings-lookups').textContent);
+        var container = document.getElementById('findings');
+        
+        // Rows are [scanner, severity, resource, issue, control], with everything
+        // but the resource stored as an index into the lookups
+        var groups = lookups.scanners.map(function () { return []; });
+        rows.forEach(function (row) { groups[row[0]].push(row); });
+        
+        function button(text) {
+            var element = document.createElement('button');
+            element.textContent = text;
+            return element;
+        }
+        
+        groups.forEach(function (group, i) {
+            var heading = document.createElement('h3');
+            heading.textContent = lookups.scanners[i].toUpperCase() + ' Scanner (' + group.length + ' findings)';
+            container.appendChild(heading);
+            if (!group.length) {
+                return;
+            }
+            
+            var table = document.createElement('table');
+            table.innerHTML = '<thead><tr><th>Severity</th><th>Resource</th><th>Issue</th><th>Control</th></tr></thead>';
+            var body = document.createElement('tbody');
+            table.appendChild(body);
+            var pager = document.createElement('div');
+            pager.className = 'pager';
+            var previous = button('Previous');
+            var next = button('Next');
+            var label = document.createElement('span');
+            pager.appendChild(previous);
+            pager.appendChild(label);
+            pager.appendChild(next);
+            container.appendChild(table);
+            container.appendChild(pager);
+            
+            var page = 0;
+            var pages = Math.ceil(group.length / PAGE_SIZE);
+            function render() {
+                body.textContent = '';
+                group.slice(page * PAGE_SIZE, (page + 1) * PAGE_SIZE).forEach(function (row) {
+                    var severity = lookups.severities[row[1]];
+                    var tr = document.createElement('tr');
+                    [severity, row[2], lookups.issues[row[3]], lookups.controls[row[4]]].forEach(function (text, column) {
+                        var td = document.createElement('td');
+                        td.textContent = text;
+                        if (column === 0) {
+                            td.className = severity.toLowerCase();
+                        }
+                        tr.appendChild(td);
+                    });
+                    body.appendChild(tr);
+                });
+                label.textContent = 'Page ' + (page + 1) + ' of ' + pages;
+                previous.disabled = page === 0;
+                next.disabled = page >= pages - 1;
+            }
+            previous.onclick = function () { page--; render(); };
+            next.onclick = function () { page++; render(); };
+            render();
+        });
+    })();
+    </script>
+</body>
+</html>
+"""
+
+_HEAD, _TAIL = (Template(part) for part in REPORT_TEMPLATE.split('<!--FINDINGS-->'))
+_SEVERITY_ROW = Template('        <tr>\n            <td class="$css">$severity</td>\n            <td>$count</td>\n        </tr>')
+_CONTROL_ROW = Template('        <tr><td>$control</td><td>$count</td></tr>')
+
+
+def _script_json(value) -> str:
+    """Serialize a value for a <script> block, so text in findings can't close the tag"""
+    return json.dumps(value, separators=(',', ':'), default=str).replace('<', '\\u003c')
+
+
+def _intern(table: Dict[str, int], value: str) -> int:
+    """Get a value's index in a lookup table, adding it if new"""
+    index = table.get(value)
+    if index is None:
+        index = table[value] = len(table)
+    return index
+
+
+def _iter_result_findings(results: Dict) -> Iterator[Tuple[str, Dict]]:
+    """Yield (scanner, finding) pairs from a results dict"""
+    for scanner, findings in results.get('findings_by_scanner', {}).items():
+        for finding in findings:
+            yield scanner, finding
+
+
+def write_html_report(output_file: str, results: Dict, findings: Optional[Iterable[Tuple[str, Dict]]] = None,
+                      title: str = 'AWS AI Governance Scan Report', badge: Optional[str] = None,
+                      scan_mode: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Write the HTML report, returning the number of findings in it
+    
+    findings defaults to results['findings_by_scanner']; pass an iterator such as
+    results_stream.iter_findings() to render from an NDJSON file without loading it.
+    """
+    metadata = results.get('scan_metadata', {})
+    summary = results.get('summary', {})
+    severity_breakdown = summary.get('severity_breakdown', {})
+    
+    head = _HEAD.substitute(
+        title=html.escape(title),
+        badge=f'    <span class="badge badge-all">{html.escape(badge)}</span>\n' if badge else '',
+        timestamp=html.escape(str(metadata.get('timestamp', ''))),
+        region=html.escape(str(metadata.get('region', ''))),
+        regions=html.escape(', '.join(metadata.get('regions', {}))),
+        scan_mode=f'        <p><strong>Scan Mode:</strong> {html.escape(scan_mode)}</p>' if scan_mode else '',
+        total_findings=summary.get('total_findings', 0),
+        risk_score=summary.get('risk_score', 0),
+        severity_rows='\n'.join(
+            _SEVERITY_ROW.substitute(css=severity.lower(), severity=severity, count=severity_breakdown.get(severity, 0))
+            for severity in SEVERITIES
+        ),
+        control_rows='\n'.join(
+            _CONTROL_ROW.substitute(control=html.escape(control), count=count)
+            for control, count in list(summary.get('top_violated_controls', {}).items())[:10]
+        )
+    )
+    
+    # Every scanner gets a section, even one without findings
+    scanners = {scanner: i for i, scanner in enumerate(results.get('findings_by_scanner', {}))}
+    severities = {severity: i for i, severity in enumerate(SEVERITIES)}
+    issues: Dict[str, int] = {}
+    controls: Dict[str, int] = {}
+    
+    count = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(head)
+        chunk: List[str] = []
+        for scanner, finding in (_iter_result_findings(results) if findings is None else findings):
+            resource_name = finding.get('resource_name') or finding.get('role_name') or finding.get('bucket_name', 'N/A')
+            chunk.append(_script_json([
+                _intern(scanners, scanner),
+                _intern(severities, finding.get('severity', 'UNKNOWN')),
+                resource_name,
+                _intern(issues, finding.get('issue', 'N/A')),
+                _intern(controls, finding.get('control', 'N/A'))
+            ]))
+            if len(chunk) >= chunk_size:
+                f.write((',' if count else '') + ','.join(chunk))
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            f.write((',' if count else '') + ','.join(chunk))
+            count += len(chunk)
+        
+        f.write(_TAIL.substitute(
+            page_size=PAGE_SIZE,
+            lookups=_script_json({
+                'scanners': list(scanners),
+                'severities': list(severities),
+                'issues': list(issues),
+                'controls': list(controls)
+            })
+        ))
+    return count
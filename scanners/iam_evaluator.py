@@ -0,0 +1,222 @@
+"""
+IAM Permission Evaluator
+Answers "can this role perform this action?" offline from the policy documents
+the IAM scanner has already collected, without SimulatePrincipalPolicy calls
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .policy_index import CompiledStatement, compile_policy, wildcard_regex
+
+
+ALLOW = 'Allow'
+EXPLICIT_DENY = 'ExplicitDeny'
+IMPLICIT_DENY = 'ImplicitDeny'
+
+
+def arn_service(resource_arn: str) -> str:
+    """Get the service of an ARN (arn:partition:service:...), or '*' if it has none"""
+    parts = resource_arn.split(':')
+    return parts[2].lower() if len(parts) > 2 else '*'
+
+
+@dataclass(frozen=True)
+class IndexedStatement:
+    """A compiled statement and the policy (name or ARN) it came from"""
+    policy: str
+    statement: CompiledStatement
+    
+    def matches_action(self, action: str) -> bool:
+        """Check the statement's Action/NotAction against a concrete action"""
+        if self.statement.not_actions:
+            return not any(wildcard_regex(p).match(action) for p in self.statement.not_actions)
+        return any(wildcard_regex(p).match(action) for p in self.statement.actions)
+    
+    def matches_resource(self, resource: Optional[str]) -> bool:
+        """Check the statement's Resource/NotResource against a resource ARN
+        
+        With no resource the question is "on any resource": an Allow matches if it
+        covers some resource, a Deny only if it covers every resource.
+        """
+        statement = self.statement
+        if resource is None:
+            if statement.is_allow:
+                return bool(statement.resources) or '*' not in statement.not_resources
+            return '*' in statement.resources
+        
+        if statement.not_resources:
+            return not any(wildcard_regex(p, False).match(resource) for p in statement.not_resources)
+        return any(wildcard_regex(p, False).match(resource) for p in statement.resources)
+    
+    def matches_service(self, service: str, every: bool = False) -> bool:
+        """Check the statement's Action/NotAction covers some action of a service, or with every, all of them"""
+        statement = self.statement
+        service_wildcard = f"{service}:*"
+        if every:
+            if statement.not_actions:
+                return not any(wildcard_regex(p.split(':', 1)[0]).match(service) for p in statement.not_actions)
+            return any(wildcard_regex(p).match(service_wildcard) for p in statement.actions)
+        if statement.not_actions:
+            return not any(wildcard_regex(p).match(service_wildcard) for p in statement.not_actions)
+        return any(wildcard_regex(p.split(':', 1)[0]).match(service) for p in statement.actions)
+    
+    def reaches_resource(self, resource: str) -> bool:
+        """Check the statement's Resource/NotResource includes a resource ARN or something beneath it"""
+        if self.statement.not_resources:
+            return self.matches_resource(resource)
+        child = resource + '/'
+        return (
+            self.matches_resource(resource) or self.matches_resource(child)
+            or any(p.startswith(child) for p in self.statement.resources)
+        )
+
+
+@dataclass
+class Decision:
+    """Result of evaluating one action for one role"""
+    decision: str
+    # Statements that decided the result (the denies for ExplicitDeny, the allows for Allow)
+    statements: List[IndexedStatement] = field(default_factory=list)
+    # True when the result depends on Condition blocks, which aren't evaluated offline
+    conditional: bool = False
+    
+    @property
+    def allowed(self) -> bool:
+        return self.decision == ALLOW
+
+
+class RolePermissions:
+    """Statements of one role's policies, indexed by service prefix"""
+    
+    def __init__(self, policies: List[Tuple[str, Dict]]):
+        self._by_service: Dict[str, List[IndexedStatement]] = {}
+        # NotAction statements and service wildcards ('*', 's3*:Get*') can match any service
+        self._any_service: List[IndexedStatement] = []
+        self._decisions: Dict[Tuple[str, Optional[str]], Decision] = {}
+        self._reach_decisions: Dict[Tuple[Optional[str], str], Decision] = {}
+        
+        for policy_name, document in policies:
+            for statement in compile_policy(document):
+                self._index(IndexedStatement(policy_name, statement))
+    
+    @classmethod
+    def from_statements(cls, statements: Iterable[IndexedStatement]) -> 'RolePermissions':
+        """Build from already compiled statements"""
+        permissions = cls([])
+        for indexed in statements:
+            permissions._index(indexed)
+        return permissions
+    
+    def services(self) -> Set[str]:
+        """Get the services the statements name ('*' if some can match any service)"""
+        return set(self._by_service) | ({'*'} if self._any_service else set())
+    
+    def _index(self, indexed: IndexedStatement) -> None:
+        """Add a statement under each service its actions name"""
+        statement = indexed.statement
+        services = set()
+        for pattern in statement.actions:
+            service = pattern.split(':', 1)[0].lower()
+            if ':' not in pattern or '*' in service or '?' in service:
+                self._any_service.append(indexed)
+                return
+            services.add(service)
+        if statement.not_actions:
+            self._any_service.append(indexed)
+        for service in services:
+            self._by_service.setdefault(service, []).append(indexed)
+    
+    def evaluate(self, action: str, resource: Optional[str] = None) -> Decision:
+        """Evaluate an action (optionally on a resource ARN) with IAM's deny-overrides logic
+        
+        Permission boundaries, SCPs, session and resource-based policies are not considered.
+        """
+        key = (action.lower(), resource)
+        decision = self._decisions.get(key)
+        if decision is None:
+            decision = self._decisions[key] = self._evaluate(action, resource)
+        return decision
+    
+    def can(self, action: str, resource: Optional[str] = None) -> bool:
+        """Check if an action is allowed"""
+        return self.evaluate(action, resource).allowed
+    
+    def reach(self, resource: str, action: Optional[str] = None) -> Decision:
+        """Evaluate whether an action, or with none any action of the resource's service, reaches a resource
+        
+        Allows reaching something beneath the resource (objects in a bucket) count. Without an
+        action a Deny only counts if it covers every action of the service, and a Deny on an
+        S3 bucket only if it covers the bucket's objects too.
+        """
+        key = (action.lower() if action else None, resource)
+        decision = self._reach_decisions.get(key)
+        if decision is None:
+            decision = self._reach_decisions[key] = self._reach(resource, action)
+        return decision
+    
+    def _reach(self, resource: str, action: Optional[str]) -> Decision:
+        service = action.split(':', 1)[0].lower() if action else arn_service(resource)
+        candidates = self._by_service.get(service, []) + self._any_service
+        targets = [resource]
+        if arn_service(resource) == 's3' and '/' not in resource:
+            targets.append(resource + '/*')
+        
+        denies = [
+            indexed for indexed in candidates
+            if indexed.statement.effect == 'Deny'
+            and (indexed.matches_action(action) if action else indexed.matches_service(service, every=True))
+            and all(indexed.matches_resource(target) for target in targets)
+        ]
+        definite_denies = [indexed for indexed in denies if not indexed.statement.has_condition]
+        if definite_denies:
+            return Decision(EXPLICIT_DENY, definite_denies)
+        
+        allows = [
+            indexed for indexed in candidates
+            if indexed.statement.is_allow
+            and (indexed.matches_action(action) if action else indexed.matches_service(service))
+            and indexed.reaches_resource(resource)
+        ]
+        if allows:
+            conditional = bool(denies) or all(indexed.statement.has_condition for indexed in allows)
+            return Decision(ALLOW, allows, conditional)
+        return Decision(IMPLICIT_DENY)
+    
+    def _evaluate(self, action: str, resource: Optional[str]) -> Decision:
+        service = action.split(':', 1)[0].lower()
+        candidates = self._by_service.get(service, []) + self._any_service
+        matched = [
+            indexed for indexed in candidates
+            if indexed.matches_action(action) and indexed.matches_resource(resource)
+        ]
+        
+        denies = [indexed for indexed in matched if indexed.statement.effect == 'Deny']
+        definite_denies = [indexed for indexed in denies if not indexed.statement.has_condition]
+        if definite_denies:
+            return Decision(EXPLICIT_DENY, definite_denies)
+        
+        allows = [indexed for indexed in matched if indexed.statement.is_allow]
+        if allows:
+            conditional = bool(denies) or all(indexed.statement.has_condition for indexed in allows)
+            return Decision(ALLOW, allows, conditional)
+        return Decision(IMPLICIT_DENY)
+
+
+class PermissionEvaluator:
+    """Offline permission queries over many roles"""
+    
+    def __init__(self, role_policies: Dict[str, List[Tuple[str, Dict]]]):
+        self.roles = {role: RolePermissions(policies) for role, policies in role_policies.items()}
+    
+    def evaluate(self, role: str, action: str, resource: Optional[str] = None) -> Decision:
+        """Evaluate an action for a role"""
+        return self.roles[role].evaluate(action, resource)
+    
+    def can(self, role: str, action: str, resource: Optional[str] = None) -> bool:
+        """Check if a role is allowed an action"""
+        return self.roles[role].can(action, resource)
+    
+    def roles_that_can(self, action: str, resource: Optional[str] = None) -> List[str]:
+        """Get every role allowed an action, sorted by name"""
+        return sorted(role for role, permissions in self.roles.items() if permissions.can(action, resource))
@@ -6,42 +6,169 @@ ISO 27001 A.5.15-A.5.18, ISO 27701 6.2.1-6.2.3, ISO 42001 6.1.3-6.1.4
 
 import boto3
 import json
-from typing import List, Dict
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+import re
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
+from botocore.config import Config
 
-@dataclass
-class IAMFinding:
+from .access_advisor import ServiceLastAccessedOrchestrator
+from .access_graph import AccessGraph
+from .concurrency import Memo, ProgressMeter, TokenBucket, iter_ordered
+from .iam_evaluator import PermissionEvaluator
+from .policy_index import ActionMatcher, compile_policy, policy_hash
+from .rules import Finding
+from .state_store import get_state_store
+
+
+# AWS-managed policies (any partition) are shared by every account and rarely change
+AWS_MANAGED_POLICY_ARN = re.compile(r'^arn:[^:]+:iam::aws:policy/')
+
+# Actions reported as dangerous; policy patterns such as iam:* or s3:Delete* match them too
+DANGEROUS_ACTIONS = [
+    'iam:CreateRole', 'iam:DeleteRole', 'iam:PutRolePolicy',
+    'kms:DisableKey', 'kms:ScheduleKeyDeletion',
+    's3:DeleteBucket', 'sagemaker:DeleteNotebookInstance'
+]
+DANGEROUS_ACTION_MATCHER = ActionMatcher(DANGEROUS_ACTIONS)
+
+# Inventory modes: bulk reads every role and policy through GetAccountAuthorizationDetails,
+# per-role lists roles and fetches each role's policies separately
+INVENTORY_MODES = ['bulk', 'per-role']
+
+# IAM's control plane allows only a few requests per second per account
+DEFAULT_IAM_API_RATE = 10
+
+# Services a role hasn't called for this many days are reported as unused
+UNUSED_SERVICE_DAYS = 90
+
+# State store key and lifetime for persisted AWS-managed policy documents
+MANAGED_POLICY_STATE_KEY = 'iam-managed-policies'
+MANAGED_POLICY_MAX_AGE = 30 * 24 * 3600
+
+
+class IAMFinding(Finding):
     """IAM security finding"""
-    role_name: str
-    role_arn: str
-    severity: str
-    issue: str
-    control: str
-    remediation: str
-    timestamp: str
+    __slots__ = ()
+    
+    @property
+    def role_name(self) -> str:
+        return self.resource_name
+    
+    @property
+    def role_arn(self) -> str:
+        return self.resource_arn
+    
+    def to_dict(self) -> Dict:
+        """Expand to the exported finding record"""
+        return {
+            'rule_id': self.rule_id,
+            'role_name': self.role_name,
+            'role_arn': self.role_arn,
+            'severity': self.severity,
+            'issue': self.issue,
+            'control': self.control,
+            'remediation': self.remediation,
+            'timestamp': self.timestamp
+        }
 
 
 class IAMScanner:
     """Scanner for IAM roles used by SageMaker"""
     
-    def __init__(self):
-        self.iam = boto3.client('iam')
+    def __init__(self, state_store=None, inventory: str = 'bulk', concurrency: int = 1,
+                 api_rate: float = DEFAULT_IAM_API_RATE, unused_services: bool = False,
+                 collect_records: bool = False):
+        if inventory not in INVENTORY_MODES:
+            raise ValueError(f"Unknown inventory mode: {inventory}")
+        if api_rate <= 0:
+            raise ValueError(f"API rate must be positive: {api_rate}")
+        self.inventory = inventory
+        self.concurrency = max(1, concurrency)
+        # Per-service usage needs two extra calls per role, so it is opt-in
+        self.unused_services = unused_services
+        self.iam = boto3.client('iam', config=Config(max_pool_connections=max(10, self.concurrency)))
+        self.api_calls: Dict[str, int] = {}
+        self._api_calls_lock = threading.Lock()
+        # Every IAM call, from any worker, takes a token first
+        self.rate_limiter = TokenBucket(api_rate)
+        self.iam.meta.events.register('before-call', self._before_api_call)
+        # Optional LocalStateStore/DynamoDBStateStore; persists AWS-managed policy documents
+        self.state_store = state_store
+        # Scan-lifetime caches: PolicyArn -> DefaultVersionId, (PolicyArn, VersionId) -> document
+        self.policy_versions = Memo()
+        self.policy_documents = Memo()
+        # Content hash of a canonicalized policy document -> verdict
+        self.policy_verdicts = Memo()
+        # Role name -> (policy name or ARN, document) pairs seen in the scan
+        self.role_policies: Dict[str, List[Tuple[str, Dict]]] = {}
+        self.role_arns: Dict[str, str] = {}
+        # (resource type, AWS record) pairs; only kept for policy evaluation
+        self.collect_records = collect_records
+        self.resource_records: List[Tuple[str, Dict]] = []
+        self.scan_metadata: Dict = {}
+        # Shared by every finding of the scan
+        self.timestamp = datetime.utcnow().isoformat()
         self.findings: List[IAMFinding] = []
     
     def scan_all(self) -> List[IAMFinding]:
         """Scan all SageMaker IAM roles"""
+        self.findings.extend(self.iter_findings())
+        return self.findings
+    
+    def iter_findings(self) -> Iterator[IAMFinding]:
+        """Scan all SageMaker IAM roles, yielding each role's findings once it is checked"""
         print("[*] Starting IAM role scan...")
+        self.timestamp = datetime.utcnow().isoformat()
         
-        roles = self._get_sagemaker_roles()
-        print(f"[*] Found {len(roles)} SageMaker roles")
+        persisted = self._load_managed_policies() if self.state_store else 0
         
-        for role in roles:
-            self._check_role(role)
+        count = 0
+        for finding in self._iter_role_findings():
+            count += 1
+            yield finding
         
-        print(f"[+] Scan complete. Found {len(self.findings)} violations.")
-        return self.findings
+        if self.state_store:
+            self._save_managed_policies()
+        self.scan_metadata['policy_cache'] = {
+            **self.policy_documents.stats(),
+            'persisted_documents_loaded': persisted
+        }
+        verdict_stats = self.policy_verdicts.stats()
+        self.scan_metadata['policy_documents'] = {
+            'total': verdict_stats['hits'] + verdict_stats['misses'],
+            'distinct': verdict_stats['misses']
+        }
+        self.scan_metadata['api_calls'] = dict(sorted(self.api_calls.items()))
+        
+        print(f"[+] Scan complete. Found {count} violations.")
+        print(f"[*] Policy document cache hit rate: {self.scan_metadata['policy_cache']['hit_rate']:.0%}")
+    
+    def _iter_role_findings(self) -> Iterator[IAMFinding]:
+        """Check every role, yielding each role's findings once it is checked"""
+        roles = self._get_bulk_roles() if self.inventory == 'bulk' else None
+        if roles is None:
+            self.scan_metadata['inventory'] = 'per-role'
+            roles = self._get_sagemaker_roles()
+            print(f"[*] Found {len(roles)} SageMaker roles")
+            
+            # Fetching is concurrent; checks run in role order as fetches complete
+            progress = ProgressMeter(len(roles), 'roles')
+            fetched = iter_ordered(lambda role: self._fetch_role(role, progress), roles, self.concurrency)
+            for role, (policies, role_last_used) in zip(roles, fetched):
+                yield from self._check_policies(role, policies)
+                if role_last_used is not None:
+                    yield from self._check_stale_role(role, role_last_used)
+            self.scan_metadata['roles_per_second'] = round(progress.rate(), 1)
+        else:
+            self.scan_metadata['inventory'] = 'bulk'
+            print(f"[*] Found {len(roles)} SageMaker roles")
+            for role in roles:
+                yield from self._check_bulk_role(role)
+        
+        if self.unused_services:
+            yield from self._check_unused_services(roles)
     
     def _get_sagemaker_roles(self) -> List[Dict]:
         """Get all IAM roles with SageMaker trust relationship"""
@@ -50,36 +177,102 @@ class IAMScanner:
         
         for page in paginator.paginate():
             for role in page['Roles']:
-                trust_policy = role['AssumeRolePolicyDocument']
-                for statement in trust_policy.get('Statement', []):
-                    principal = statement.get('Principal', {})
-                    service = principal.get('Service', '')
-                    if isinstance(service, str):
-                        service = [service]
-                    if 'sagemaker.amazonaws.com' in service:
-                        roles.append(role)
-                        break
+                if self._is_sagemaker_role(role):
+                    roles.append(role)
         
         return roles
     
-    def _check_role(self, role: Dict) -> None:
-        """Check individual role for violations"""
+    def _get_bulk_roles(self) -> Optional[List[Dict]]:
+        """Get SageMaker roles with their policies in bulk, or None if the API is unavailable"""
+        # Managed policy documents from the same response seed the policy cache,
+        # so attached policies resolve without further calls
+        roles = []
+        try:
+            paginator = self.iam.get_paginator('get_account_authorization_details')
+            for page in paginator.paginate(Filter=['Role', 'LocalManagedPolicy', 'AWSManagedPolicy']):
+                for policy in page.get('Policies', []):
+                    self._seed_policy(policy)
+                for role in page.get('RoleDetailList', []):
+                    if self._is_sagemaker_role(role):
+                        roles.append(role)
+        except Exception as e:
+            print(f"[!] Bulk IAM inventory unavailable, using per-role calls: {e}")
+            return None
+        return roles
+    
+    def _seed_policy(self, policy: Dict) -> None:
+        """Add a managed policy's default version from GetAccountAuthorizationDetails to the cache"""
+        version_id = policy['DefaultVersionId']
+        self.policy_versions.seed(policy['Arn'], version_id)
+        for version in policy.get('PolicyVersionList', []):
+            if version['VersionId'] == version_id:
+                self.policy_documents.seed((policy['Arn'], version_id), version['Document'])
+    
+    def _is_sagemaker_role(self, role: Dict) -> bool:
+        """Check if a role's trust policy lets SageMaker assume it"""
+        trust_policy = role['AssumeRolePolicyDocument']
+        for statement in trust_policy.get('Statement', []):
+            principal = statement.get('Principal', {})
+            service = principal.get('Service', '')
+            if isinstance(service, str):
+                service = [service]
+            if 'sagemaker.amazonaws.com' in service:
+                return True
+        return False
+    
+    def _check_bulk_role(self, role: Dict) -> List[IAMFinding]:
+        """Check a role from GetAccountAuthorizationDetails, which already carries its policies"""
+        policies = [
+            (policy['PolicyName'], policy['PolicyDocument']) for policy in role.get('RolePolicyList', [])
+        ]
+        try:
+            for policy in role.get('AttachedManagedPolicies', []):
+                policies.append((policy['PolicyArn'], self._get_policy_document(policy['PolicyArn'])))
+        except Exception as e:
+            print(f"[!] Error getting attached policies for {role['RoleName']}: {e}")
+        
+        return self._check_policies(role, policies) + self._check_stale_role(role, role.get('RoleLastUsed', {}))
+    
+    def _fetch_role(self, role: Dict, progress: Optional[ProgressMeter] = None) -> Tuple[List[Tuple[str, Dict]], Optional[Dict]]:
+        """Fetch a role's policies and RoleLastUsed (None if GetRole fails)"""
         role_name = role['RoleName']
         
-        # Get inline policies
-        inline_policies = self._get_inline_policies(role_name)
+        # Get inline and attached policies
+        policies = self._get_inline_policies(role_name) + self._get_attached_policies(role_name)
         
-        # Get attached policies
-        attached_policies = self._get_attached_policies(role_name)
+        # ListRoles doesn't return RoleLastUsed
+        try:
+            role_last_used = self.iam.get_role(RoleName=role_name)['Role'].get('RoleLastUsed', {})
+        except Exception as e:
+            print(f"[!] Error checking last used for {role_name}: {e}")
+            role_last_used = None
         
-        # Check for violations
-        self._check_wildcard_actions(role, inline_policies + attached_policies)
-        self._check_wildcard_resources(role, inline_policies + attached_policies)
-        self._check_dangerous_permissions(role, inline_policies + attached_policies)
-        self._check_stale_role(role)
+        if progress:
+            progress.tick()
+        return policies, role_last_used
+    
+    def _check_policies(self, role: Dict, policies: List[Tuple[str, Dict]]) -> List[IAMFinding]:
+        """Run the policy checks over a role's (name or ARN, document) pairs"""
+        # Kept for offline permission queries once the scan is done
+        self.role_policies[role['RoleName']] = policies
+        self.role_arns[role['RoleName']] = role['Arn']
+        if self.collect_records:
+            self.resource_records.append(('AWS::IAM::Role', {**role, 'Policies': policies}))
+        return self._check_statements(role, [document for _, document in policies])
+    
+    def get_permission_evaluator(self) -> PermissionEvaluator:
+        """Get an offline evaluator over the policies collected by the last scan"""
+        return PermissionEvaluator(self.role_policies)
+    
+    def build_access_graph(self, graph: Optional[AccessGraph] = None) -> AccessGraph:
+        """Add the roles and policies collected by the last scan to an access graph"""
+        graph = graph if graph is not None else AccessGraph()
+        for role_name, policies in self.role_policies.items():
+            graph.add_role(self.role_arns[role_name], role_name, policies)
+        return graph
     
-    def _get_inline_policies(self, role_name: str) -> List[Dict]:
-        """Get inline policies for role"""
+    def _get_inline_policies(self, role_name: str) -> List[Tuple[str, Dict]]:
+        """Get inline policies for role as (policy name, document) pairs"""
         policies = []
         try:
             policy_names = self.iam.list_role_policies(RoleName=role_name)
@@ -88,132 +281,178 @@ class IAMScanner:
                     RoleName=role_name,
                     PolicyName=policy_name
                 )
-                policies.append(policy['PolicyDocument'])
+                policies.append((policy_name, policy['PolicyDocument']))
         except Exception as e:
             print(f"[!] Error getting inline policies for {role_name}: {e}")
         return policies
     
-    def _get_attached_policies(self, role_name: str) -> List[Dict]:
-        """Get attached managed policies for role"""
+    def _get_attached_policies(self, role_name: str) -> List[Tuple[str, Dict]]:
+        """Get attached managed policies for role as (policy ARN, document) pairs"""
         policies = []
         try:
             attached = self.iam.list_attached_role_policies(RoleName=role_name)
             for policy in attached['AttachedPolicies']:
-                policy_arn = policy['PolicyArn']
-                policy_version = self.iam.get_policy(PolicyArn=policy_arn)
-                version_id = policy_version['Policy']['DefaultVersionId']
-                policy_doc = self.iam.get_policy_version(
-                    PolicyArn=policy_arn,
-                    VersionId=version_id
-                )
-                policies.append(policy_doc['PolicyVersion']['Document'])
+                policies.append((policy['PolicyArn'], self._get_policy_document(policy['PolicyArn'])))
         except Exception as e:
             print(f"[!] Error getting attached policies for {role_name}: {e}")
         return policies
     
-    def _check_wildcard_actions(self, role: Dict, policies: List[Dict]) -> None:
-        """Check for wildcard actions"""
-        for policy in policies:
-            for statement in policy.get('Statement', []):
-                if statement.get('Effect') != 'Allow':
-                    continue
-                
-                actions = statement.get('Action', [])
-                if isinstance(actions, str):
-                    actions = [actions]
-                
-                if '*' in actions:
-                    self.findings.append(IAMFinding(
-                        role_name=role['RoleName'],
-                        role_arn=role['Arn'],
-                        severity='CRITICAL',
-                        issue='Role has wildcard action (*)',
-                        control='ISO 27001 A.5.15, ISO 27701 6.2.1',
-                        remediation='Replace wildcard with specific actions',
-                        timestamp=datetime.utcnow().isoformat()
-                    ))
-    
-    def _check_wildcard_resources(self, role: Dict, policies: List[Dict]) -> None:
-        """Check for wildcard resources"""
-        for policy in policies:
-            for statement in policy.get('Statement', []):
-                if statement.get('Effect') != 'Allow':
-                    continue
-                
-                resources = statement.get('Resource', [])
-                if isinstance(resources, str):
-                    resources = [resources]
-                
-                if '*' in resources:
-                    self.findings.append(IAMFinding(
-                        role_name=role['RoleName'],
-                        role_arn=role['Arn'],
-                        severity='HIGH',
-                        issue='Role has wildcard resource (*)',
-                        control='ISO 27001 A.5.16',
-                        remediation='Scope permissions to specific resources',
-                        timestamp=datetime.utcnow().isoformat()
-                    ))
-    
-    def _check_dangerous_permissions(self, role: Dict, policies: List[Dict]) -> None:
-        """Check for dangerous permissions"""
-        dangerous_actions = {
-            'iam:CreateRole', 'iam:DeleteRole', 'iam:PutRolePolicy',
-            'kms:DisableKey', 'kms:ScheduleKeyDeletion',
-            's3:DeleteBucket', 'sagemaker:DeleteNotebookInstance'
-        }
+    def _get_policy_document(self, policy_arn: str) -> Dict:
+        """Get a managed policy's default version document, fetching each version once per scan"""
+        # The default version can't change mid-scan as far as the report is
+        # concerned, and a given version's document is immutable
+        version_id = self.policy_versions.get(
+            policy_arn,
+            lambda: self.iam.get_policy(PolicyArn=policy_arn)['Policy']['DefaultVersionId']
+        )
+        return self.policy_documents.get(
+            (policy_arn, version_id),
+            lambda: self.iam.get_policy_version(
+                PolicyArn=policy_arn,
+                VersionId=version_id
+            )['PolicyVersion']['Document']
+        )
+    
+    def _load_managed_policies(self) -> int:
+        """Seed the document cache with persisted AWS-managed policies, returning how many were loaded"""
+        try:
+            state = self.state_store.get(MANAGED_POLICY_STATE_KEY) or {}
+        except Exception as e:
+            print(f"[!] Error loading managed policy cache: {e}")
+            return 0
+        
+        for entry in state.get('documents', []):
+            self.policy_documents.seed((entry['arn'], entry['version_id']), entry['document'])
+        return len(state.get('documents', []))
+    
+    def _save_managed_policies(self) -> None:
+        """Persist the AWS-managed policy documents seen in this scan"""
+        documents = [
+            {'arn': arn, 'version_id': version_id, 'document': document}
+            for (arn, version_id), document in sorted(self.policy_documents.values().items())
+            if AWS_MANAGED_POLICY_ARN.match(arn)
+        ]
+        try:
+            self.state_store.put(
+                MANAGED_POLICY_STATE_KEY, {'documents': documents}, ttl_seconds=MANAGED_POLICY_MAX_AGE
+            )
+        except Exception as e:
+            print(f"[!] Error saving managed policy cache: {e}")
+    
+    def _before_api_call(self, model, **kwargs) -> None:
+        """Rate limit and count IAM API calls by operation"""
+        self.rate_limiter.acquire()
+        with self._api_calls_lock:
+            self.api_calls[model.name] = self.api_calls.get(model.name, 0) + 1
+    
+    def _check_statements(self, role: Dict, policies: List[Dict]) -> List[IAMFinding]:
+        """Check a role against the verdicts of its (deduplicated) policy documents"""
+        findings = []
+        verdicts = [self._get_policy_verdict(policy) for policy in policies]
+        
+        # One finding per rule per role, however many statements match
+        if any(verdict['wildcard_action'] for verdict in verdicts):
+            findings.append(self._finding('iam.role.wildcard_action', role))
+        
+        if any(verdict['wildcard_resource'] for verdict in verdicts):
+            findings.append(self._finding('iam.role.wildcard_resource', role))
         
-        for policy in policies:
-            for statement in policy.get('Statement', []):
-                if statement.get('Effect') != 'Allow':
-                    continue
-                
-                actions = statement.get('Action', [])
-                if isinstance(actions, str):
-                    actions = [actions]
-                
-                found_dangerous = set(actions) & dangerous_actions
-                if found_dangerous:
-                    self.findings.append(IAMFinding(
-                        role_name=role['RoleName'],
-                        role_arn=role['Arn'],
-                        severity='HIGH',
-                        issue=f'Role has dangerous permissions: {", ".join(found_dangerous)}',
-                        control='ISO 27001 A.5.18, ISO 42001 6.1.3',
-                        remediation='Remove dangerous permissions or require approval workflow',
-                        timestamp=datetime.utcnow().isoformat()
-                    ))
-    
-    def _check_stale_role(self, role: Dict) -> None:
+        found_dangerous = {action for verdict in verdicts for action in verdict['dangerous_actions']}
+        if found_dangerous:
+            findings.append(self._finding('iam.role.dangerous_actions', role, {
+                'actions': ', '.join(a for a in DANGEROUS_ACTIONS if a in found_dangerous)
+            }))
+        
+        return findings
+    
+    def _get_policy_verdict(self, policy: Dict) -> Dict:
+        """Get a policy document's verdict, evaluating each distinct document once"""
+        # Roles stamped from the same template carry byte-identical documents
+        return self.policy_verdicts.get(policy_hash(policy), lambda: self._evaluate_policy(policy))
+    
+    def _evaluate_policy(self, policy: Dict) -> Dict:
+        """Evaluate every policy rule in a single pass over the compiled statements"""
+        verdict = {'wildcard_action': False, 'wildcard_resource': False, 'dangerous_actions': []}
+        
+        for statement in compile_policy(policy):
+            if not statement.is_allow:
+                continue
+            if statement.has_wildcard_action:
+                verdict['wildcard_action'] = True
+            if statement.has_wildcard_resource:
+                verdict['wildcard_resource'] = True
+            # A bare * is reported by the wildcard action rule instead
+            if not statement.has_wildcard_action:
+                for action in DANGEROUS_ACTION_MATCHER.granted(statement):
+                    if action not in verdict['dangerous_actions']:
+                        verdict['dangerous_actions'].append(action)
+        
+        return verdict
+    
+    def _check_unused_services(self, roles: List[Dict]) -> List[IAMFinding]:
+        """Check for services a role is allowed but hasn't used, from service last accessed data"""
+        findings = []
+        print("[*] Checking service last accessed data...")
+        orchestrator = ServiceLastAccessedOrchestrator(self.iam, self.state_store)
+        usage = orchestrator.fetch([role['Arn'] for role in roles])
+        self.scan_metadata['service_last_accessed'] = orchestrator.stats
+        
+        cutoff = datetime.now(timezone.utc) - timedelta(days=UNUSED_SERVICE_DAYS)
+        for role in roles:
+            services = usage.get(role['Arn'])
+            # Roles younger than the window haven't had a chance to use everything
+            if services is None or (role.get('CreateDate') and role['CreateDate'] > cutoff):
+                continue
+            
+            unused = sorted(
+                service['namespace'] for service in services
+                if not service['last_authenticated']
+                or datetime.fromisoformat(service['last_authenticated']) < cutoff
+            )
+            if unused:
+                findings.append(self._finding('iam.role.unused_services', role, {
+                    'days': UNUSED_SERVICE_DAYS,
+                    'services': ', '.join(unused)
+                }))
+        
+        return findings
+    
+    def _finding(self, rule_id: str, role: Dict, detail: Optional[Dict] = None) -> IAMFinding:
+        """Create a finding for a rule on a role"""
+        return IAMFinding(rule_id, role['RoleName'], role['Arn'], timestamp=self.timestamp, detail=detail)
+    
+    def _check_stale_role(self, role: Dict, role_last_used: Optional[Dict] = None) -> List[IAMFinding]:
         """Check if role hasn't been used recently"""
+        findings = []
         try:
             role_name = role['RoleName']
-            role_details = self.iam.get_role(RoleName=role_name)
+            if role_last_used is None:
+                role_details = self.iam.get_role(RoleName=role_name)
+                role_last_used = role_details['Role'].get('RoleLastUsed', {})
             
-            last_used = role_details['Role'].get('RoleLastUsed', {}).get('LastUsedDate')
+            last_used = role_last_used.get('LastUsedDate')
             if last_used:
                 days_since_use = (datetime.now(last_used.tzinfo) - last_used).days
                 if days_since_use > 90:
-                    self.findings.append(IAMFinding(
-                        role_name=role_name,
-                        role_arn=role['Arn'],
-                        severity='MEDIUM',
-                        issue=f'Role not used in {days_since_use} days',
-                        control='ISO 27001 A.5.18, ISO 27701 6.2.3',
-                        remediation='Review and remove if unnecessary',
-                        timestamp=datetime.utcnow().isoformat()
-                    ))
+                    findings.append(self._finding('iam.role.stale', role, {'days': days_since_use}))
         except Exception as e:
             print(f"[!] Error checking last used for {role['RoleName']}: {e}")
+        return findings
+    
+    def get_api_calls(self) -> Dict[str, int]:
+        """Get the number of IAM API calls made so far, by operation"""
+        with self._api_calls_lock:
+            return dict(sorted(self.api_calls.items()))
     
     def export_findings(self, output_file: str = 'iam_findings.json') -> None:
         """Export findings to JSON"""
-        findings_dict = [asdict(f) for f in self.findings]
+        findings_dict = [f.to_dict() for f in self.findings]
         
         with open(output_file, 'w') as f:
             json.dump({
                 'scan_timestamp': datetime.utcnow().isoformat(),
                 'total_findings': len(self.findings),
+                'scan_metadata': self.scan_metadata,
                 'severity_breakdown': self._get_severity_breakdown(),
                 'findings': findings_dict
             }, f, indent=2)
@@ -240,15 +479,77 @@ class IAMScanner:
         print(f"  HIGH:     {breakdown['HIGH']}")
         print(f"  MEDIUM:   {breakdown['MEDIUM']}")
         print(f"  LOW:      {breakdown['LOW']}")
+        
+        if self.scan_metadata.get('inventory'):
+            print(f"\nInventory: {self.scan_metadata['inventory']} "
+                  f"({sum(self.scan_metadata['api_calls'].values())} IAM API calls)")
+        if self.scan_metadata.get('roles_per_second') is not None:
+            print(f"Role Fetch Rate: {self.scan_metadata['roles_per_second']} roles/sec")
+        documents = self.scan_metadata.get('policy_documents')
+        if documents:
+            print(f"Policy Documents: {documents['distinct']} distinct of {documents['total']} evaluated")
+        cache = self.scan_metadata.get('policy_cache')
+        if cache:
+            print(f"\nPolicy Document Cache: {cache['hits']} hits, {cache['misses']} misses "
+                  f"({cache['hit_rate']:.0%} hit rate)")
         print("="*60 + "\n")
 
 
 def main():
     """Main entry point"""
-    scanner = IAMScanner()
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='Scan IAM roles used by SageMaker for least privilege violations'
+    )
+    parser.add_argument(
+        '--state-store',
+        help="Directory or 'dynamodb[:table]' for persisting AWS-managed policy documents"
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='Roles fetched in parallel in per-role mode (default: 1)'
+    )
+    parser.add_argument(
+        '--api-rate',
+        type=float,
+        default=DEFAULT_IAM_API_RATE,
+        help=f'Maximum IAM API calls per second across all workers (default: {DEFAULT_IAM_API_RATE})'
+    )
+    parser.add_argument(
+        '--unused-services',
+        action='store_true',
+        help='Report services each role is allowed but has not used (service last accessed jobs)'
+    )
+    parser.add_argument(
+        '--inventory',
+        choices=INVENTORY_MODES,
+        default='bulk',
+        help='Role inventory mode; bulk falls back to per-role when unavailable (default: bulk)'
+    )
+    parser.add_argument(
+        '--graph-output',
+        help='Write the role/policy access graph here (.json or .json.gz) for offline queries'
+    )
+    
+    args = parser.parse_args()
+    if args.api_rate <= 0:
+        parser.error('--api-rate must be greater than 0')
+    
+    scanner = IAMScanner(
+        state_store=get_state_store(args.state_store),
+        inventory=args.inventory,
+        concurrency=args.concurrency,
+        api_rate=args.api_rate,
+        unused_services=args.unused_services
+    )
     scanner.scan_all()
     scanner.print_summary()
     scanner.export_findings()
+    if args.graph_output:
+        scanner.build_access_graph().save(args.graph_output)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,385 @@
+"""
+OPA Policy Evaluator
+Evaluates the policies/*.rego bundle against the inventory collected by the
+scanners, in large batches through one long-running OPA server
+"""
+
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import urllib.request
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+DEFAULT_POLICY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'policies')
+DEFAULT_BATCH_SIZE = 1000
+# Rule added to every package: evaluates `deny` for each element of input.resources
+BATCH_RULE = 'governance_batch_deny'
+
+# Input field holding each resource type's name, for reporting violations
+NAME_FIELDS = {
+    'AWS::SageMaker::NotebookInstance': 'notebook_name',
+    'AWS::SageMaker::TrainingJob': 'training_job_name',
+    'AWS::SageMaker::Model': 'model_name',
+    'AWS::SageMaker::EndpointConfig': 'endpoint_config_name',
+    'AWS::IAM::Role': 'role_name',
+    'AWS::S3::Bucket': 'bucket_name',
+}
+
+# S3 bucket record field -> the policy input field derived from it
+S3_UNKNOWN_FIELDS = {
+    'TagSet': 'tags',
+    'Encryption': 'encryption_enabled',
+    'Versioning': 'versioning_enabled',
+    'Lifecycle': 'lifecycle_rules',
+    'PublicAccessBlock': 'public_access_block'
+}
+
+
+class OPAEvaluator:
+    """Runs `opa run --server` once over the bundle and posts inputs to it in batches
+    
+    The bundle is parsed and compiled when the server starts, so per-resource
+    cost is only evaluation. Each package only receives the resource types it checks.
+    """
+    
+    def __init__(self, policy_dir: str = DEFAULT_POLICY_DIR, opa_binary: str = 'opa',
+                 batch_size: int = DEFAULT_BATCH_SIZE, startup_timeout: float = 30.0):
+        self.policy_dir = policy_dir
+        self.opa_binary = opa_binary
+        self.batch_size = max(1, batch_size)
+        self.startup_timeout = startup_timeout
+        # Package -> resource types named in its source
+        self.packages: Dict[str, List[str]] = {}
+        # Package -> REST path of its batch rule, as resolved by the server
+        self._rule_paths: Dict[str, str] = {}
+        self.scan_metadata: Dict = {}
+        self._process: Optional[subprocess.Popen] = None
+        self._workdir: Optional[str] = None
+        self._url = ''
+    
+    def __enter__(self) -> 'OPAEvaluator':
+        self.start()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
+    def start(self) -> None:
+        """Start the OPA server with the bundle loaded"""
+        binary = shutil.which(self.opa_binary)
+        if not binary:
+            raise RuntimeError(f"OPA binary '{self.opa_binary}' not found; see https://www.openpolicyagent.org/docs/#running-opa")
+        
+        started = time.monotonic()
+        self._workdir = tempfile.mkdtemp(prefix='opa-batch-')
+        for path in sorted(os.listdir(self.policy_dir)):
+            if path.endswith('.rego') and not path.endswith('_test.rego'):
+                self._add_batch_rule(os.path.join(self.policy_dir, path))
+        
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        self._url = f"http://127.0.0.1:{port}"
+        self._process = subprocess.Popen(
+            [binary, 'run', '--server', '--addr', f"127.0.0.1:{port}", '--log-level', 'error',
+             self.policy_dir, self._workdir],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+        self._wait_until_ready()
+        self._resolve_rule_paths()
+        self.scan_metadata['startup_seconds'] = round(time.monotonic() - started, 3)
+        print(f"[*] OPA server ready with {len(self.packages)} policy packages "
+              f"({self.scan_metadata['startup_seconds']}s)")
+    
+    def close(self) -> None:
+        """Stop the server and remove the generated batch rules"""
+        if self._process:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process = None
+        if self._workdir:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+            self._workdir = None
+    
+    def evaluate(self, inputs: Iterable[Dict]) -> List[Dict]:
+        """Evaluate every input against the packages that check its resource type
+        
+        Timing is per package: a package's deny bodies are evaluated together by one
+        query, and OPA's REST metrics only time the query as a whole.
+        """
+        inputs = list(inputs)
+        started = time.monotonic()
+        violations = []
+        package_stats = {}
+        for package, resource_types in self.packages.items():
+            routed = [doc for doc in inputs if doc.get('resource_type') in resource_types]
+            stats = package_stats[package] = {'resources': len(routed), 'batches': 0, 'violations': 0,
+                                              'seconds': 0.0, 'eval_seconds': 0.0}
+            for start in range(0, len(routed), self.batch_size):
+                batch = routed[start:start + self.batch_size]
+                batch_started = time.monotonic()
+                results, eval_ns = self._query(package, batch)
+                stats['seconds'] += time.monotonic() - batch_started
+                stats['eval_seconds'] += eval_ns / 1e9
+                stats['batches'] += 1
+                for doc, messages in zip(batch, results):
+                    for message in sorted(messages):
+                        violation = {
+                            'package': package,
+                            'resource_type': doc['resource_type'],
+                            'resource_name': doc.get(NAME_FIELDS.get(doc['resource_type'], ''), 'unknown'),
+                            'message': message
+                        }
+                        if doc.get('unknown_attributes'):
+                            violation['unknown_attributes'] = doc['unknown_attributes']
+                        violations.append(violation)
+                        stats['violations'] += 1
+            stats['seconds'] = round(stats['seconds'], 3)
+            stats['eval_seconds'] = round(stats['eval_seconds'], 3)
+            stats['resources_per_second'] = round(stats['resources'] / stats['seconds'], 1) if stats['seconds'] else None
+        
+        elapsed = time.monotonic() - started
+        self.scan_metadata.update({
+            'inputs': len(inputs),
+            'violations': len(violations),
+            'seconds': round(elapsed, 3),
+            'inputs_per_second': round(len(inputs) / elapsed, 1) if elapsed else None,
+            'packages': package_stats
+        })
+        print(f"[+] OPA evaluated {len(inputs)} policy inputs in {elapsed:.2f}s, {len(violations)} violations")
+        return violations
+    
+    def _add_batch_rule(self, path: str) -> None:
+        """Write a module that adds the batch rule to a policy file's package"""
+        with open(path) as f:
+            source = f.read()
+        match = re.search(r'^package\s+([\w.]+)', source, re.MULTILINE)
+        if not match:
+            return
+        package = match.group(1)
+        self.packages[package] = sorted(set(re.findall(r'"(AWS::[\w:]+)"', source)))
+        with open(os.path.join(self._workdir, _batch_module_name(package)), 'w') as f:
+            f.write(
+                f"package {package}\n\n"
+                f"{BATCH_RULE} := [violations |\n"
+                f"    resource := input.resources[_]\n"
+                f"    violations := deny with input as resource\n"
+                f"]\n"
+            )
+    
+    def _wait_until_ready(self) -> None:
+        """Poll the health endpoint until the bundle has compiled"""
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                error = self._process.stderr.read().decode(errors='replace').strip()
+                self.close()
+                raise RuntimeError(f"OPA server exited: {error}")
+            try:
+                with urllib.request.urlopen(f"{self._url}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                pass
+            time.sleep(0.1)
+        self.close()
+        raise RuntimeError(f"OPA server not ready after {self.startup_timeout}s")
+    
+    def _resolve_rule_paths(self) -> None:
+        """Look up each batch module's package path below data in the compiled policies"""
+        # Taken from the server's AST rather than the package line, since
+        # a package written as data.x is rooted at data.data.x
+        with urllib.request.urlopen(f"{self._url}/v1/policies") as response:
+            modules = json.load(response)['result']
+        for module in modules:
+            if not module['id'].startswith(self._workdir):
+                continue
+            path = [term['value'] for term in module['ast']['package']['path'][1:]]
+            package = next(p for p in self.packages if module['id'].endswith(_batch_module_name(p)))
+            self._rule_paths[package] = '/'.join(path + [BATCH_RULE])
+    
+    def _query(self, package: str, batch: List[Dict]) -> Tuple[List[List[str]], int]:
+        """Evaluate one batch against a package, returning per-input messages and eval time (ns)"""
+        request = urllib.request.Request(
+            f"{self._url}/v1/data/{self._rule_paths[package]}?metrics=true",
+            data=json.dumps({'input': {'resources': batch}}, default=str).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request) as response:
+            body = json.load(response)
+        return body.get('result', [[] for _ in batch]), body.get('metrics', {}).get('timer_rego_query_eval_ns', 0)
+
+
+def _batch_module_name(package: str) -> str:
+    """File name of the generated batch module for a package"""
+    return f"{package.replace('.', '_')}_batch.rego"
+
+
+def to_policy_inputs(resource_type: str, record: Dict) -> List[Dict]:
+    """Map a scanner's raw AWS record to the input documents the Rego policies expect"""
+    tags = record.get('Tags') or record.get('TagSet') or []
+    classification = next((tag['Value'] for tag in tags if tag.get('Key') == 'DataClassification'), None)
+    
+    if resource_type == 'AWS::SageMaker::NotebookInstance':
+        return [_compact({
+            'resource_type': resource_type,
+            'notebook_name': record['NotebookInstanceName'],
+            'kms_key_id': record.get('KmsKeyId'),
+            'root_access': record.get('RootAccess'),
+            'direct_internet_access': record.get('DirectInternetAccess'),
+            'subnet_id': record.get('SubnetId'),
+            'data_classification': classification,
+            'tags': tags
+        })]
+    
+    if resource_type == 'AWS::SageMaker::TrainingJob':
+        return [_compact({
+            'resource_type': resource_type,
+            'training_job_name': record['TrainingJobName'],
+            'output_data_config': _compact({'kms_key_id': record.get('OutputDataConfig', {}).get('KmsKeyId')}),
+            'resource_config': _compact({'volume_kms_key_id': record.get('ResourceConfig', {}).get('VolumeKmsKeyId')}),
+            'enable_inter_container_traffic_encryption': record.get('EnableInterContainerTrafficEncryption', False),
+            'enable_network_isolation': record.get('EnableNetworkIsolation', False),
+            'data_classification': classification,
+            'tags': tags
+        })]
+    
+    if resource_type == 'AWS::SageMaker::Model':
+        return [_compact({
+            'resource_type': resource_type,
+            'model_name': record['ModelName'],
+            'vpc_config': record.get('VpcConfig') or None,
+            'data_classification': classification,
+            'tags': tags
+        })]
+    
+    if resource_type == 'AWS::SageMaker::EndpointConfig':
+        return [_compact({
+            'resource_type': resource_type,
+            'endpoint_config_name': record['EndpointConfigName'],
+            'kms_key_id': record.get('KmsKeyId'),
+            'production_variants': [
+                _compact({'instance_type': variant.get('InstanceType')})
+                for variant in record.get('ProductionVariants', [])
+            ]
+        })]
+    
+    if resource_type == 'AWS::IAM::Role':
+        # The IAM policy checks one policy document per input
+        last_used = (record.get('RoleLastUsed') or {}).get('LastUsedDate')
+        base = _compact({
+            'resource_type': resource_type,
+            'role_name': record['RoleName'],
+            'account_id': record['Arn'].split(':')[4],
+            'assume_role_policy': _normalize_document(record.get('AssumeRolePolicyDocument') or {}),
+            'last_used_date': last_used.isoformat() if hasattr(last_used, 'isoformat') else last_used,
+            'tags': tags
+        })
+        return [
+            {**base, 'policy_name': policy_name, 'policy_document': _normalize_document(document)}
+            for policy_name, document in record.get('Policies', [])
+        ]
+    
+    if resource_type == 'AWS::S3::Bucket':
+        name = record['Name']
+        versioning = record.get('Versioning') or {}
+        lifecycle = record.get('Lifecycle') or {}
+        public_access = (record.get('PublicAccessBlock') or {}).get('PublicAccessBlockConfiguration')
+        unknown = record.get('Unknown') or []
+        document = _compact({
+            'resource_type': resource_type,
+            'bucket_name': name,
+            'region': record.get('Region'),
+            'sagemaker_usage': 'sagemaker' in name.lower() or any(
+                tag.get('Key') == 'Service' and tag.get('Value') == 'SageMaker' for tag in tags
+            ),
+            'encryption_enabled': bool(record.get('Encryption')),
+            'versioning_enabled': versioning.get('Status') == 'Enabled',
+            'lifecycle_rules': [
+                _compact({'expiration_days': rule.get('Expiration', {}).get('Days')})
+                for rule in lifecycle.get('Rules', [])
+            ],
+            'public_access_block': public_access and {
+                'block_public_acls': public_access.get('BlockPublicAcls', False)
+            },
+            'tags': tags
+        })
+        if unknown:
+            # Attributes that couldn't be read are left out and named, so violations
+            # that may only stem from the missing data can be told apart
+            for field in unknown:
+                document.pop(S3_UNKNOWN_FIELDS[field], None)
+            document['unknown_attributes'] = sorted(S3_UNKNOWN_FIELDS[field] for field in unknown)
+        return [document]
+    return []
+
+
+def strip_response_metadata(record: Dict) -> Dict:
+    """Copy of an AWS response without its ResponseMetadata, for keeping as a resource record"""
+    return {key: value for key, value in record.items() if key != 'ResponseMetadata'}
+
+
+def _compact(document: Dict) -> Dict:
+    """Drop None values: Rego treats a null field as defined, unlike a missing one"""
+    return {key: value for key, value in document.items() if value is not None}
+
+
+def _normalize_document(document: Dict) -> Dict:
+    """Normalize a policy document's str-or-list fields to lists, as the Rego rules iterate them"""
+    statements = document.get('Statement', [])
+    if isinstance(statements, dict):
+        statements = [statements]
+    normalized = []
+    for statement in statements:
+        statement = dict(statement)
+        for key in ('Action', 'NotAction', 'Resource', 'NotResource'):
+            if isinstance(statement.get(key), str):
+                statement[key] = [statement[key]]
+        principal = statement.get('Principal')
+        if isinstance(principal, dict):
+            statement['Principal'] = {
+                key: [value] if isinstance(value, str) else value for key, value in principal.items()
+            }
+        normalized.append(statement)
+    return {**document, 'Statement': normalized}
+
+
+def main():
+    """Evaluate policy inputs from JSON files"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Evaluate the Rego policy bundle against policy inputs')
+    parser.add_argument('inputs', nargs='+', help='JSON files, each an input document or a list of them')
+    parser.add_argument('--policies', default=DEFAULT_POLICY_DIR, help='Policy directory (default: policies/)')
+    parser.add_argument('--opa', default='opa', help='OPA binary (default: opa on PATH)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Inputs per request (default: {DEFAULT_BATCH_SIZE})')
+    
+    args = parser.parse_args()
+    
+    inputs = []
+    for path in args.inputs:
+        with open(path) as f:
+            data = json.load(f)
+        inputs.extend(data if isinstance(data, list) else [data])
+    
+    with OPAEvaluator(args.policies, args.opa, args.batch_size) as evaluator:
+        violations = evaluator.evaluate(inputs)
+    for violation in violations:
+        print(f"[{violation['package']}] {violation['message']}")
+    print(json.dumps(evaluator.scan_metadata, indent=2))
+
+
+if __name__ == '__main__':
+    main()
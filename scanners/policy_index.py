@@ -0,0 +1,106 @@
+"""
+Policy Statement Index
+Compiles IAM policy documents into normalized statements once, and matches
+wildcard action patterns against a catalog of actions
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+
+@dataclass(frozen=True)
+class CompiledStatement:
+    """A policy statement with its action/resource fields normalized to tuples"""
+    effect: str
+    actions: Tuple[str, ...]
+    not_actions: Tuple[str, ...]
+    resources: Tuple[str, ...]
+    not_resources: Tuple[str, ...]
+    has_condition: bool = False
+    
+    @property
+    def is_allow(self) -> bool:
+        return self.effect == 'Allow'
+    
+    @property
+    def has_wildcard_action(self) -> bool:
+        return '*' in self.actions
+    
+    @property
+    def has_wildcard_resource(self) -> bool:
+        return '*' in self.resources
+
+
+def _as_tuple(value) -> Tuple[str, ...]:
+    """Normalize a str-or-list policy field to a tuple"""
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(value)
+
+
+def compile_policy(document: Dict) -> List[CompiledStatement]:
+    """Compile a policy document's statements (a single statement may be given as an object)"""
+    statements = document.get('Statement', [])
+    if isinstance(statements, dict):
+        statements = [statements]
+    
+    return [
+        CompiledStatement(
+            effect=statement.get('Effect', ''),
+            actions=_as_tuple(statement.get('Action')),
+            not_actions=_as_tuple(statement.get('NotAction')),
+            resources=_as_tuple(statement.get('Resource')),
+            not_resources=_as_tuple(statement.get('NotResource')),
+            has_condition=bool(statement.get('Condition'))
+        )
+        for statement in statements
+    ]
+
+
+def policy_hash(document: Dict) -> str:
+    """Hash a policy document's canonical JSON, so formatting and key order don't matter"""
+    canonical = json.dumps(document, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def wildcard_regex(pattern: str, ignore_case: bool = True) -> 're.Pattern':
+    """Compile an IAM wildcard pattern (* and ?) into a line regex (actions match case-insensitively, ARNs don't)"""
+    body = ''.join(
+        '[^\n]*' if char == '*' else '[^\n]' if char == '?' else re.escape(char)
+        for char in pattern
+    )
+    return re.compile(f'^{body}$', (re.IGNORECASE if ignore_case else 0) | re.MULTILINE)
+
+
+class ActionMatcher:
+    """Matches IAM action patterns against a fixed catalog of actions"""
+    
+    def __init__(self, catalog: Iterable[str]):
+        # Catalog order is preserved so matches are reported deterministically
+        self.catalog = list(dict.fromkeys(catalog))
+        self._canonical = {action.lower(): action for action in self.catalog}
+        # One regex search over the newline-joined catalog finds every action a pattern covers
+        self._text = '\n'.join(action.lower() for action in self.catalog)
+    
+    def match(self, pattern: str) -> List[str]:
+        """Get the catalog actions a single action pattern covers"""
+        if '*' not in pattern and '?' not in pattern:
+            canonical = self._canonical.get(pattern.lower())
+            return [canonical] if canonical else []
+        return [self._canonical[action] for action in wildcard_regex(pattern.lower()).findall(self._text)]
+    
+    def granted(self, statement: CompiledStatement) -> List[str]:
+        """Get the catalog actions a statement's Action or NotAction covers, in catalog order"""
+        if statement.not_actions:
+            excluded = {action for pattern in statement.not_actions for action in self.match(pattern)}
+            return [action for action in self.catalog if action not in excluded]
+        
+        matched = {action for pattern in statement.actions for action in self.match(pattern)}
+        return [action for action in self.catalog if action in matched]
@@ -0,0 +1,63 @@
+"""
+Region Fan-Out
+Resolves which regions to scan and runs a per-region scan across them in parallel
+"""
+
+import time
+from typing import Callable, Dict, List, Optional
+
+import boto3
+
+from .concurrency import run_ordered
+
+
+def get_enabled_regions(service: str = 'sagemaker', region: str = 'us-east-1') -> List[str]:
+    """Get the regions enabled for this account in which the service is available"""
+    # DescribeRegions only returns regions the account has enabled (or that need no opt-in)
+    ec2 = boto3.client('ec2', region_name=region)
+    enabled = {r['RegionName'] for r in ec2.describe_regions()['Regions']}
+    available = set(boto3.session.Session().get_available_regions(service))
+    return sorted(enabled & available if available else enabled)
+
+
+def resolve_regions(spec: Optional[str], default_region: str = 'us-east-1',
+                    service: str = 'sagemaker') -> List[str]:
+    """Resolve 'all', a comma-separated list or None (the default region) to region names"""
+    if not spec:
+        return [default_region]
+    if spec.strip().lower() == 'all':
+        return get_enabled_regions(service, default_region)
+    
+    regions = []
+    for region in spec.split(','):
+        region = region.strip()
+        if region and region not in regions:
+            regions.append(region)
+    return regions or [default_region]
+
+
+def split_concurrency(total: int, region_count: int) -> Dict[str, int]:
+    """Split a total concurrency budget into parallel regions and workers per region"""
+    total = max(1, total)
+    region_workers = max(1, min(region_count, total))
+    return {
+        'region_workers': region_workers,
+        'per_region': max(1, total // region_workers)
+    }
+
+
+def fan_out(scan_region: Callable[[str], object], regions: List[str], max_workers: int = 1) -> Dict[str, Dict]:
+    """Run scan_region for every region, returning each region's result, timing and error"""
+    def run(region: str) -> Dict:
+        start = time.monotonic()
+        outcome = {'result': None, 'error': None}
+        try:
+            outcome['result'] = scan_region(region)
+        except Exception as e:
+            # One region failing (e.g. an SCP denying it) shouldn't lose the others
+            print(f"[!] Error scanning {region}: {e}")
+            outcome['error'] = str(e)
+        outcome['duration_seconds'] = round(time.monotonic() - start, 3)
+        return outcome
+    
+    return dict(zip(regions, run_ordered(run, regions, max_workers)))
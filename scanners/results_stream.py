@@ -0,0 +1,115 @@
+"""
+Streaming Results
+NDJSON scan results: one finding per line, written as scanners produce them,
+then a trailing summary record; gzip-compressed when the path ends in .gz
+"""
+
+import gzip
+import json
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+
+# Output paths with these suffixes are streamed as NDJSON instead of one JSON document
+STREAM_SUFFIXES = ('.ndjson', '.ndjson.gz', '.jsonl', '.jsonl.gz')
+
+# Results keys rebuilt from the finding records rather than stored in the summary record
+FINDING_KEYS = ('findings_by_scanner', 'consolidated_findings')
+
+
+def is_stream_path(path: str) -> bool:
+    """Check if an output path names an NDJSON results file"""
+    return path.endswith(STREAM_SUFFIXES)
+
+
+def _open(path: str, mode: str):
+    """Open a results file as text, through gzip if the path ends in .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class ResultsWriter:
+    """Thread-safe NDJSON writer that scanners running side by side can share
+    
+    Each finding becomes a {"type": "finding", "scanner": ..., "finding": {...}} line as
+    soon as it is written, so memory doesn't grow with the file. close() appends a
+    {"type": "summary", ...} record holding the rest of the results; a file without
+    one is from a scan that didn't finish.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.findings_written = 0
+        self._file = _open(path, 'w')
+        self._lock = threading.Lock()
+    
+    def write_finding(self, scanner: str, finding: Dict) -> None:
+        """Append a finding dict for a scanner"""
+        line = json.dumps({'type': 'finding', 'scanner': scanner, 'finding': finding}, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self.findings_written += 1
+    
+    def close(self, results: Optional[Dict] = None) -> None:
+        """Write the summary record (everything in results except the findings) and close the file"""
+        with self._lock:
+            if self._file.closed:
+                return
+            if results is not None:
+                record = {key: value for key, value in results.items() if key not in FINDING_KEYS}
+                record['findings_written'] = self.findings_written
+                self._file.write(json.dumps({'type': 'summary', **record}, default=str) + '\n')
+            self._file.close()
+    
+    def __enter__(self) -> 'ResultsWriter':
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """Yield the records of an NDJSON results file one at a time"""
+    with _open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_findings(path: str) -> Iterator[Tuple[str, Dict]]:
+    """Yield (scanner, finding dict) pairs from an NDJSON results file without loading it whole"""
+    for record in iter_records(path):
+        if record.get('type') == 'finding':
+            yield record['scanner'], record['finding']
+
+
+def load_results(path: str) -> Dict:
+    """Load a results file (NDJSON or the single-document JSON export) into the results dict layout"""
+    if not is_stream_path(path):
+        with _open(path, 'r') as f:
+            return json.load(f)
+    
+    findings_by_scanner: Dict[str, list] = {}
+    summary_record = None
+    for record in iter_records(path):
+        if record.get('type') == 'finding':
+            findings_by_scanner.setdefault(record['scanner'], []).append(record['finding'])
+        elif record.get('type') == 'summary':
+            summary_record = record
+    
+    if summary_record is None:
+        print(f"[!] {path} has no summary record; the scan may not have finished")
+        summary_record = {}
+    results = {key: value for key, value in summary_record.items() if key not in ('type', 'findings_written')}
+    
+    # Scanners ran side by side, so their findings are interleaved in the file;
+    # regroup them in the order the scan metadata lists the scanners
+    order = list(results.get('scan_metadata', {}).get('scanners', {}))
+    order += [scanner for scanner in findings_by_scanner if scanner not in order]
+    results['findings_by_scanner'] = {
+        scanner: findings_by_scanner.get(scanner, []) for scanner in order
+    }
+    results['consolidated_findings'] = [
+        finding for findings in results['findings_by_scanner'].values() for finding in findings
+    ]
+    return results
@@ -0,0 +1,167 @@
+"""
+Rule Catalog
+Metadata for every check the scanners run, and the compact finding record
+that refers to it by rule ID
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A check's fixed metadata (issue may hold {placeholders} filled from the finding's detail)"""
+    rule_id: str
+    resource_type: str
+    severity: str  # CRITICAL, HIGH, MEDIUM, LOW
+    issue: str
+    control: str
+    remediation: str
+
+
+RULES: Dict[str, Rule] = {rule.rule_id: rule for rule in [
+    # SageMaker
+    Rule('sagemaker.notebook.kms', 'AWS::SageMaker::NotebookInstance', 'HIGH',
+         'Notebook instance does not have KMS encryption enabled',
+         'ISO 27001 A.8.24, ISO 27701 6.6.1', 'Enable KMS encryption for the notebook instance'),
+    Rule('sagemaker.notebook.root_access', 'AWS::SageMaker::NotebookInstance', 'MEDIUM',
+         'Root access is enabled on notebook instance',
+         'ISO 27001 A.5.18', 'Disable root access on the notebook instance'),
+    Rule('sagemaker.notebook.direct_internet', 'AWS::SageMaker::NotebookInstance', 'HIGH',
+         'Notebook has direct internet access without VPC',
+         'ISO 27001 A.8.20, ISO 42001 6.3.2', 'Deploy notebook in VPC or disable direct internet access'),
+    Rule('sagemaker.notebook.tags', 'AWS::SageMaker::NotebookInstance', 'LOW',
+         'Missing required tags (DataClassification, Owner, Purpose)',
+         'ISO 27001 A.5.12', 'Add required tags to the notebook instance'),
+    Rule('sagemaker.training_job.output_kms', 'AWS::SageMaker::TrainingJob', 'HIGH',
+         'Training job output is not encrypted',
+         'ISO 27001 A.8.24, ISO 42001 6.3.1', 'Enable KMS encryption for training job output'),
+    Rule('sagemaker.training_job.volume_kms', 'AWS::SageMaker::TrainingJob', 'HIGH',
+         'Training job volumes are not encrypted',
+         'ISO 27001 A.8.24', 'Enable KMS encryption for training volumes'),
+    Rule('sagemaker.training_job.inter_container_encryption', 'AWS::SageMaker::TrainingJob', 'MEDIUM',
+         'Inter-container traffic encryption is not enabled',
+         'ISO 27001 A.8.24', 'Enable inter-container traffic encryption'),
+    Rule('sagemaker.training_job.network_isolation', 'AWS::SageMaker::TrainingJob', 'MEDIUM',
+         'Network isolation is not enabled',
+         'ISO 27701 6.6.2', 'Enable network isolation for training jobs'),
+    Rule('sagemaker.model.vpc', 'AWS::SageMaker::Model', 'MEDIUM',
+         'Model does not have VPC configuration',
+         'ISO 27701 6.6.2, ISO 42001 6.3.2', 'Configure VPC for model deployment'),
+    Rule('sagemaker.model.tags', 'AWS::SageMaker::Model', 'LOW',
+         'Missing required tags',
+         'ISO 27001 A.5.12', 'Add required tags to the model'),
+    Rule('sagemaker.endpoint.kms', 'AWS::SageMaker::Endpoint', 'HIGH',
+         'Endpoint does not have KMS encryption',
+         'ISO 27001 A.8.24', 'Enable KMS encryption for endpoint'),
+    Rule('sagemaker.endpoint.data_capture', 'AWS::SageMaker::Endpoint', 'LOW',
+         'Data capture not configured for monitoring',
+         'ISO 42001 9.2.2', 'Enable data capture for model monitoring'),
+    
+    # S3
+    Rule('s3.bucket.no_tags', 'AWS::S3::Bucket', 'HIGH',
+         'No tags configured',
+         'ISO 27001 A.5.12, ISO 27701 6.4.1', 'Add required tags including DataClassification'),
+    Rule('s3.bucket.classification_tag', 'AWS::S3::Bucket', 'HIGH',
+         'Missing DataClassification tag',
+         'ISO 27001 A.5.12, ISO 27701 6.4.1',
+         'Add DataClassification tag (PUBLIC, INTERNAL, SENSITIVE, PII, CONFIDENTIAL)'),
+    Rule('s3.bucket.required_tags', 'AWS::S3::Bucket', 'LOW',
+         'Missing required tags: {tags}',
+         'ISO 27001 A.5.12', 'Add missing tags'),
+    Rule('s3.bucket.encryption', 'AWS::S3::Bucket', 'CRITICAL',
+         'Bucket encryption not enabled',
+         'ISO 27001 A.8.24, ISO 27701 6.6.1', 'Enable default encryption with AWS KMS'),
+    Rule('s3.bucket.versioning', 'AWS::S3::Bucket', 'MEDIUM',
+         'Versioning not enabled',
+         'ISO 27701 6.4.3', 'Enable versioning for data protection and audit trail'),
+    Rule('s3.bucket.lifecycle', 'AWS::S3::Bucket', 'MEDIUM',
+         'No lifecycle policy configured',
+         'ISO 27001 A.5.34, ISO 27701 6.4.3', 'Configure lifecycle policy for data retention'),
+    Rule('s3.bucket.no_public_access_block', 'AWS::S3::Bucket', 'CRITICAL',
+         'No public access block configured',
+         'ISO 27701 6.6.1', 'Configure public access block'),
+    Rule('s3.bucket.public_access', 'AWS::S3::Bucket', 'CRITICAL',
+         'Public access not fully blocked',
+         'ISO 27701 6.6.1, ISO 42001 6.3.2', 'Enable all public access block settings'),
+    
+    # IAM
+    Rule('iam.role.wildcard_action', 'AWS::IAM::Role', 'CRITICAL',
+         'Role has wildcard action (*)',
+         'ISO 27001 A.5.15, ISO 27701 6.2.1', 'Replace wildcard with specific actions'),
+    Rule('iam.role.wildcard_resource', 'AWS::IAM::Role', 'HIGH',
+         'Role has wildcard resource (*)',
+         'ISO 27001 A.5.16', 'Scope permissions to specific resources'),
+    Rule('iam.role.dangerous_actions', 'AWS::IAM::Role', 'HIGH',
+         'Role has dangerous permissions: {actions}',
+         'ISO 27001 A.5.18, ISO 42001 6.1.3', 'Remove dangerous permissions or require approval workflow'),
+    Rule('iam.role.unused_services', 'AWS::IAM::Role', 'MEDIUM',
+         'Role has permissions for services unused in {days} days: {services}',
+         'ISO 27001 A.5.15, ISO 27701 6.2.1, ISO 42001 6.1.3', 'Remove permissions for unused services'),
+    Rule('iam.role.stale', 'AWS::IAM::Role', 'MEDIUM',
+         'Role not used in {days} days',
+         'ISO 27001 A.5.18, ISO 27701 6.2.3', 'Review and remove if unnecessary'),
+]}
+
+
+class Finding:
+    """Compact finding: a rule ID, the resource it applies to and the scan's timestamp
+    
+    Severity, issue, control and remediation are looked up from RULES, and the
+    full record is only built by to_dict() when findings are exported.
+    """
+    __slots__ = ('rule_id', 'resource_name', 'resource_arn', 'region', 'timestamp', 'detail')
+    
+    def __init__(self, rule_id: str, resource_name: str, resource_arn: Optional[str] = None,
+                 region: Optional[str] = None, timestamp: str = '', detail: Optional[Dict] = None):
+        self.rule_id = rule_id
+        self.resource_name = resource_name
+        self.resource_arn = resource_arn
+        self.region = region
+        # Shared by every finding of a scan rather than formatted per finding
+        self.timestamp = timestamp
+        # Values for the rule's issue placeholders, if it has any
+        self.detail = detail
+    
+    @property
+    def rule(self) -> Rule:
+        return RULES[self.rule_id]
+    
+    @property
+    def resource_type(self) -> str:
+        return self.rule.resource_type
+    
+    @property
+    def severity(self) -> str:
+        return self.rule.severity
+    
+    @property
+    def issue(self) -> str:
+        issue = self.rule.issue
+        return issue.format(**self.detail) if self.detail else issue
+    
+    @property
+    def control(self) -> str:
+        return self.rule.control
+    
+    @property
+    def remediation(self) -> str:
+        return self.rule.remediation
+    
+    def to_dict(self) -> Dict:
+        """Expand to the exported finding record"""
+        return {
+            'rule_id': self.rule_id,
+            'resource_type': self.resource_type,
+            'resource_name': self.resource_name,
+            'resource_arn': self.resource_arn,
+            'severity': self.severity,
+            'issue': self.issue,
+            'control': self.control,
+            'remediation': self.remediation,
+            'timestamp': self.timestamp,
+            'region': self.region
+        }
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.rule_id!r}, {self.resource_name!r})"
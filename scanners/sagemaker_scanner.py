@@ -5,305 +5,592 @@ ISO 27001, ISO 27701, ISO 42001 controls
 """
 
 import boto3
+import itertools
 import json
-from typing import List, Dict, Optional
-from datetime import datetime
-from dataclasses import dataclass, asdict
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from botocore.config import Config
 
+from .concurrency import FindingSink, Memo, iter_as_completed
+from .describe_engine import DescribeEngine
+from .opa_evaluator import strip_response_metadata
+from .rules import Finding
+from .state_store import get_state_store
+from .tag_index import TagIndex
 
-@dataclass
-class SecurityFinding:
+
+# Resource types whose tags are checked, loaded into the tag index before a scan
+TAGGED_RESOURCE_TYPES = [
+    'sagemaker:notebook-instance',
+    'sagemaker:model'
+]
+
+# Inventory backends: Search returns full records in pages of 100,
+# describe lists names and describes each resource
+INVENTORY_BACKENDS = ['search', 'describe']
+
+# How long persisted endpoint config verdicts are trusted (seconds)
+ENDPOINT_CONFIG_MAX_AGE = 7 * 24 * 3600
+
+# Training job verdicts stop being carried forward this long after the job was created
+TRAINING_JOB_VERDICT_DAYS = 365
+
+# Scan order of the resource families, also used to order findings
+RESOURCE_FAMILIES = [
+    ('notebooks', 'AWS::SageMaker::NotebookInstance'),
+    ('training_jobs', 'AWS::SageMaker::TrainingJob'),
+    ('models', 'AWS::SageMaker::Model'),
+    ('endpoints', 'AWS::SageMaker::Endpoint')
+]
+
+
+class SecurityFinding(Finding):
     """Represents a security finding from the scan"""
-    resource_type: str
-    resource_name: str
-    resource_arn: str
-    severity: str  # CRITICAL, HIGH, MEDIUM, LOW
-    issue: str
-    control: str
-    remediation: str
-    timestamp: str
-    region: str
+    __slots__ = ()
 
 
 class SageMakerScanner:
     """Scanner for SageMaker resources"""
     
-    def __init__(self, region: str = 'us-east-1'):
+    def __init__(self, region: str = 'us-east-1', concurrency: int = 1, state_store=None,
+                 inventory: str = 'search', collect_records: bool = False):
+        if inventory not in INVENTORY_BACKENDS:
+            raise ValueError(f"Unknown inventory backend: {inventory}")
         self.region = region
-        self.sagemaker = boto3.client('sagemaker', region_name=region)
+        self.inventory = inventory
+        # Optional LocalStateStore/DynamoDBStateStore; enables incremental training job scans
+        self.state_store = state_store
+        self._account_id: Optional[str] = None
+        self.endpoint_configs = Memo()
+        self.engine = DescribeEngine(max_workers=concurrency)
+        # Retries, including dropped connections and timeouts, are left to the
+        # describe engine so it can adapt its limits
+        self.sagemaker = boto3.client(
+            'sagemaker',
+            region_name=region,
+            config=Config(
+                max_pool_connections=max(10, self.engine.max_workers),
+                retries={'mode': 'standard', 'max_attempts': 1}
+            )
+        )
+        self.tag_index = TagIndex(region, TAGGED_RESOURCE_TYPES)
+        self.scan_metadata: Dict = {}
+        self.inventory_backends: Dict[str, str] = {}
+        # Shared by every finding of the scan
+        self.timestamp = datetime.utcnow().isoformat()
         self.findings: List[SecurityFinding] = []
+        self.sink = FindingSink(self.findings)
+        # (resource type, AWS record) pairs seen by the checks; only kept for policy evaluation
+        self.resource_records: List[Tuple[str, Dict]] = []
+        self.record_sink = FindingSink(self.resource_records) if collect_records else None
     
     def scan_all(self) -> List[SecurityFinding]:
         """Run all scans and return findings"""
+        self.findings.extend(self.iter_findings())
+        return self.findings
+    
+    def iter_findings(self) -> Iterator[SecurityFinding]:
+        """Run all scans, yielding findings as their checks complete"""
         print(f"[*] Starting SageMaker security scan in {self.region}")
+        self.timestamp = datetime.utcnow().isoformat()
         
-        self.scan_notebooks()
-        self.scan_training_jobs()
-        self.scan_models()
-        self.scan_endpoints()
+        self.tag_index.load()
         
-        print(f"[+] Scan complete. Found {len(self.findings)} violations.")
-        return self.findings
+        scans = {
+            'notebooks': self._iter_notebooks,
+            'training_jobs': self._iter_training_jobs,
+            'models': self._iter_models,
+            'endpoints': self._iter_endpoints
+        }
+        timings = {}
+        
+        def run_family(family: str) -> Iterator[SecurityFinding]:
+            # Only time spent producing findings counts, not time waiting on the consumer
+            stream = scans[family]()
+            elapsed = 0.0
+            while True:
+                start = time.monotonic()
+                try:
+                    finding = next(stream)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed += time.monotonic() - start
+                yield finding
+            timings[family] = round(elapsed, 3)
+        
+        # Families share no state, so they run side by side and a slow listing
+        # doesn't hold up the others; findings are yielded as any family produces them
+        families = [family for family, _ in RESOURCE_FAMILIES]
+        if self.engine.max_workers > 1:
+            tagged = iter_as_completed({family: run_family(family) for family in families})
+        else:
+            tagged = ((family, finding) for family in families for finding in run_family(family))
+        
+        counts = dict.fromkeys(families, 0)
+        for family, finding in tagged:
+            counts[family] += 1
+            yield finding
+        
+        self.engine.shutdown()
+        self.scan_metadata['family_timings'] = {family: timings.get(family) for family in families}
+        self.scan_metadata['family_findings'] = counts
+        self.scan_metadata['inventory_backends'] = {
+            family: self.inventory_backends[family]
+            for family in families if family in self.inventory_backends
+        }
+        self.scan_metadata['tag_index'] = self.tag_index.stats()
+        self.scan_metadata['api_stats'] = self.engine.get_stats()
+        
+        print(f"[+] Scan complete. Found {sum(counts.values())} violations.")
     
     def scan_notebooks(self) -> None:
         """Scan SageMaker notebook instances"""
+        self.sink.extend(self._iter_notebooks())
+    
+    def _iter_notebooks(self) -> Iterator[SecurityFinding]:
+        """Yield notebook instance findings"""
         print("[*] Scanning notebook instances...")
         
+        # Search does not cover notebook instances
+        self.inventory_backends['notebooks'] = 'describe'
         try:
-            paginator = self.sagemaker.get_paginator('list_notebook_instances')
-            for page in paginator.paginate():
-                for notebook in page['NotebookInstances']:
-                    self._check_notebook(notebook['NotebookInstanceName'])
+            notebooks = self.engine.paginate(
+                'ListNotebookInstances', self.sagemaker.list_notebook_instances, 'NotebookInstances'
+            )
+            names = (notebook['NotebookInstanceName'] for notebook in notebooks)
+            for findings in self.engine.map(self._check_notebook, names):
+                yield from findings
         except Exception as e:
             print(f"[!] Error scanning notebooks: {e}")
     
-    def _check_notebook(self, notebook_name: str) -> None:
+    def _check_notebook(self, notebook_name: str) -> List[SecurityFinding]:
         """Check individual notebook for violations"""
+        findings = []
         try:
-            response = self.sagemaker.describe_notebook_instance(
+            response = self.engine.call(
+                'DescribeNotebookInstance',
+                self.sagemaker.describe_notebook_instance,
                 NotebookInstanceName=notebook_name
             )
             
+            # DescribeNotebookInstance does not return tags
+            arn = response['NotebookInstanceArn']
+            tags = self._get_tags(arn)
+            self._add_record('AWS::SageMaker::NotebookInstance', {**response, 'Tags': tags})
+            
             # Check encryption
             if not response.get('KmsKeyId'):
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::NotebookInstance',
-                    resource_name=notebook_name,
-                    resource_arn=response['NotebookInstanceArn'],
-                    severity='HIGH',
-                    issue='Notebook instance does not have KMS encryption enabled',
-                    control='ISO 27001 A.8.24, ISO 27701 6.6.1',
-                    remediation='Enable KMS encryption for the notebook instance',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
+                findings.append(self._finding('sagemaker.notebook.kms', notebook_name, arn))
             
             # Check root access
             if response.get('RootAccess') == 'Enabled':
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::NotebookInstance',
-                    resource_name=notebook_name,
-                    resource_arn=response['NotebookInstanceArn'],
-                    severity='MEDIUM',
-                    issue='Root access is enabled on notebook instance',
-                    control='ISO 27001 A.5.18',
-                    remediation='Disable root access on the notebook instance',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
+                findings.append(self._finding('sagemaker.notebook.root_access', notebook_name, arn))
             
             # Check direct internet access
             if response.get('DirectInternetAccess') == 'Enabled' and not response.get('SubnetId'):
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::NotebookInstance',
-                    resource_name=notebook_name,
-                    resource_arn=response['NotebookInstanceArn'],
-                    severity='HIGH',
-                    issue='Notebook has direct internet access without VPC',
-                    control='ISO 27001 A.8.20, ISO 42001 6.3.2',
-                    remediation='Deploy notebook in VPC or disable direct internet access',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
+                findings.append(self._finding('sagemaker.notebook.direct_internet', notebook_name, arn))
             
             # Check tags
-            if not self._has_required_tags(response.get('Tags', [])):
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::NotebookInstance',
-                    resource_name=notebook_name,
-                    resource_arn=response['NotebookInstanceArn'],
-                    severity='LOW',
-                    issue='Missing required tags (DataClassification, Owner, Purpose)',
-                    control='ISO 27001 A.5.12',
-                    remediation='Add required tags to the notebook instance',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
+            if not self._has_required_tags(tags):
+                findings.append(self._finding('sagemaker.notebook.tags', notebook_name, arn))
                 
         except Exception as e:
             print(f"[!] Error checking notebook {notebook_name}: {e}")
+        return findings
     
     def scan_training_jobs(self) -> None:
         """Scan SageMaker training jobs"""
+        self.sink.extend(self._iter_training_jobs())
+    
+    def _iter_training_jobs(self) -> Iterator[SecurityFinding]:
+        """Yield training job findings"""
         print("[*] Scanning training jobs...")
         
+        if self.state_store:
+            yield from self._iter_training_jobs_incremental()
+            return
+        
+        try:
+            for _, response in self._training_job_records():
+                if response:
+                    yield from self._evaluate_training_job(response)
+        except Exception as e:
+            print(f"[!] Error scanning training jobs: {e}")
+    
+    def _iter_training_jobs_incremental(self) -> Iterator[SecurityFinding]:
+        """Scan only jobs created after the stored watermark, carrying forward earlier verdicts"""
+        # Training job settings are fixed at creation, so a job's verdict never changes
+        try:
+            key = f"training-jobs#{self._get_account_id()}#{self.region}"
+            state = self.state_store.get(key) or {}
+        except Exception as e:
+            print(f"[!] Error loading training job watermark, running a full scan: {e}")
+            key, state = None, {}
+        
+        watermark = state.get('watermark')
+        verdicts = state.get('verdicts', {})
+        since = datetime.fromisoformat(watermark) if watermark else None
+        latest = since
+        checked = 0
+        
+        # Jobs that failed to describe last time are retried by name
+        retry_names = list(state.get('pending', []))
+        retried = self.engine.map(
+            lambda name: ({'TrainingJobName': name}, self._describe_training_job(name)),
+            retry_names
+        )
+        new_verdicts = {}
+        pending = []
+        # A retried job can be listed again when it was created at the watermark
+        seen = set()
+        error = None
         try:
-            paginator = self.sagemaker.get_paginator('list_training_jobs')
-            for page in paginator.paginate(MaxResults=100):
-                for job in page['TrainingJobSummaries']:
-                    self._check_training_job(job['TrainingJobName'])
+            for summary, response in itertools.chain(retried, self._training_job_records(since)):
+                job_name = summary['TrainingJobName']
+                if 'CreationTime' in summary and (latest is None or summary['CreationTime'] > latest):
+                    latest = summary['CreationTime']
+                if job_name in seen:
+                    continue
+                seen.add(job_name)
+                if response is None:
+                    pending.append(job_name)
+                    continue
+                checked += 1
+                findings = self._evaluate_training_job(response)
+                yield from findings
+                if findings:
+                    created = response.get('CreationTime') or summary.get('CreationTime')
+                    new_verdicts[job_name] = {
+                        'created': created.isoformat() if created else None,
+                        'findings': [{'rule_id': f.rule_id, 'resource_arn': f.resource_arn} for f in findings]
+                    }
         except Exception as e:
             print(f"[!] Error scanning training jobs: {e}")
+            error = str(e)
+        
+        # Carry forward verdicts for jobs checked in earlier runs, even if this run's
+        # listing failed, so their findings don't drop out of the results. Verdicts
+        # past retention are dropped so the state document doesn't grow forever
+        cutoff = datetime.now(timezone.utc) - timedelta(days=TRAINING_JOB_VERDICT_DAYS)
+        carried_forward = expired = 0
+        for job_name, verdict in verdicts.items():
+            if job_name in new_verdicts or job_name in pending:
+                continue
+            if verdict['created'] and datetime.fromisoformat(verdict['created']) < cutoff:
+                expired += 1
+                continue
+            for record in verdict['findings']:
+                yield self._finding(record['rule_id'], job_name, record['resource_arn'])
+            new_verdicts[job_name] = verdict
+            carried_forward += 1
+        
+        new_watermark = latest.isoformat() if latest else None
+        self.scan_metadata['training_jobs_incremental'] = {
+            'previous_watermark': watermark,
+            'watermark': new_watermark,
+            'jobs_checked': checked,
+            'verdicts_carried_forward': carried_forward,
+            'verdicts_expired': expired,
+            'pending': len(pending),
+            'error': error
+        }
+        # A failed listing may have stopped short of jobs older than the newest one
+        # seen, so the stored state is left as it was for the next run to redo
+        if key and error is None:
+            try:
+                self.state_store.put(key, {
+                    'watermark': new_watermark,
+                    'verdicts': new_verdicts,
+                    'pending': pending
+                })
+            except Exception as e:
+                print(f"[!] Error saving training job watermark: {e}")
+    
+    def _training_job_records(self, created_after: Optional[datetime] = None) -> Iterator[Tuple[Dict, Optional[Dict]]]:
+        """Yield (summary, full record) for training jobs, optionally only those created after a time"""
+        # The record is None when a describe call fails
+        def search():
+            kwargs = {}
+            if created_after:
+                kwargs['SearchExpression'] = {'Filters': [{
+                    'Name': 'CreationTime',
+                    'Operator': 'GreaterThan',
+                    # Search only accepts whole seconds without an offset; truncating can
+                    # only return a job from the watermark's second again, never skip one
+                    'Value': created_after.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+                }]}
+            return ((record, record) for record in self._search('TrainingJob', **kwargs))
+        
+        def describe():
+            kwargs = {'MaxResults': 100}
+            if created_after:
+                kwargs['CreationTimeAfter'] = created_after
+            jobs = self.engine.paginate(
+                'ListTrainingJobs', self.sagemaker.list_training_jobs, 'TrainingJobSummaries', **kwargs
+            )
+            return self.engine.map(
+                lambda job: (job, self._describe_training_job(job['TrainingJobName'])), jobs
+            )
+        
+        return self._inventory('training_jobs', search, describe)
     
-    def _check_training_job(self, job_name: str) -> None:
-        """Check individual training job for violations"""
+    def _describe_training_job(self, job_name: str) -> Optional[Dict]:
+        """Describe a training job, or None if the call fails"""
         try:
-            response = self.sagemaker.describe_training_job(
+            return self.engine.call(
+                'DescribeTrainingJob',
+                self.sagemaker.describe_training_job,
                 TrainingJobName=job_name
             )
-            
-            # Check output encryption
-            if not response.get('OutputDataConfig', {}).get('KmsKeyId'):
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::TrainingJob',
-                    resource_name=job_name,
-                    resource_arn=response['TrainingJobArn'],
-                    severity='HIGH',
-                    issue='Training job output is not encrypted',
-                    control='ISO 27001 A.8.24, ISO 42001 6.3.1',
-                    remediation='Enable KMS encryption for training job output',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
-            
-            # Check volume encryption
-            if not response.get('ResourceConfig', {}).get('VolumeKmsKeyId'):
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::TrainingJob',
-                    resource_name=job_name,
-                    resource_arn=response['TrainingJobArn'],
-                    severity='HIGH',
-                    issue='Training job volumes are not encrypted',
-                    control='ISO 27001 A.8.24',
-                    remediation='Enable KMS encryption for training volumes',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
-            
-            # Check inter-container encryption
-            if not response.get('EnableInterContainerTrafficEncryption', False):
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::TrainingJob',
-                    resource_name=job_name,
-                    resource_arn=response['TrainingJobArn'],
-                    severity='MEDIUM',
-                    issue='Inter-container traffic encryption is not enabled',
-                    control='ISO 27001 A.8.24',
-                    remediation='Enable inter-container traffic encryption',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
-            
-            # Check network isolation
-            if not response.get('EnableNetworkIsolation', False):
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::TrainingJob',
-                    resource_name=job_name,
-                    resource_arn=response['TrainingJobArn'],
-                    severity='MEDIUM',
-                    issue='Network isolation is not enabled',
-                    control='ISO 27701 6.6.2',
-                    remediation='Enable network isolation for training jobs',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
-                
         except Exception as e:
             print(f"[!] Error checking training job {job_name}: {e}")
+            return None
+    
+    def _evaluate_training_job(self, response: Dict) -> List[SecurityFinding]:
+        """Check a described training job for violations"""
+        job_name = response['TrainingJobName']
+        findings = []
+        self._add_record('AWS::SageMaker::TrainingJob', response)
+        
+        # Check output encryption
+        if not response.get('OutputDataConfig', {}).get('KmsKeyId'):
+            findings.append(self._finding('sagemaker.training_job.output_kms', job_name, response['TrainingJobArn']))
+        
+        # Check volume encryption
+        if not response.get('ResourceConfig', {}).get('VolumeKmsKeyId'):
+            findings.append(self._finding('sagemaker.training_job.volume_kms', job_name, response['TrainingJobArn']))
+        
+        # Check inter-container encryption
+        if not response.get('EnableInterContainerTrafficEncryption', False):
+            findings.append(self._finding(
+                'sagemaker.training_job.inter_container_encryption', job_name, response['TrainingJobArn']
+            ))
+        
+        # Check network isolation
+        if not response.get('EnableNetworkIsolation', False):
+            findings.append(self._finding('sagemaker.training_job.network_isolation', job_name, response['TrainingJobArn']))
+        
+        return findings
     
     def scan_models(self) -> None:
         """Scan SageMaker models"""
+        self.sink.extend(self._iter_models())
+    
+    def _iter_models(self) -> Iterator[SecurityFinding]:
+        """Yield model findings"""
         print("[*] Scanning models...")
         
+        # Search returns model dashboard records, which carry the model's tags
+        def search():
+            return (self._evaluate_model(record['Model']) for record in self._search('Model'))
+        
+        def describe():
+            models = self.engine.paginate('ListModels', self.sagemaker.list_models, 'Models')
+            names = (model['ModelName'] for model in models)
+            return self.engine.map(self._check_model, names)
+        
         try:
-            paginator = self.sagemaker.get_paginator('list_models')
-            for page in paginator.paginate():
-                for model in page['Models']:
-                    self._check_model(model['ModelName'])
+            for findings in self._inventory('models', search, describe):
+                yield from findings
         except Exception as e:
             print(f"[!] Error scanning models: {e}")
     
-    def _check_model(self, model_name: str) -> None:
+    def _check_model(self, model_name: str) -> List[SecurityFinding]:
         """Check individual model for violations"""
         try:
-            response = self.sagemaker.describe_model(ModelName=model_name)
-            
-            # Check VPC configuration for sensitive models
-            if not response.get('VpcConfig'):
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::Model',
-                    resource_name=model_name,
-                    resource_arn=response['ModelArn'],
-                    severity='MEDIUM',
-                    issue='Model does not have VPC configuration',
-                    control='ISO 27701 6.6.2, ISO 42001 6.3.2',
-                    remediation='Configure VPC for model deployment',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
-            
-            # Check tags
-            if not self._has_required_tags(response.get('Tags', [])):
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::Model',
-                    resource_name=model_name,
-                    resource_arn=response['ModelArn'],
-                    severity='LOW',
-                    issue='Missing required tags',
-                    control='ISO 27001 A.5.12',
-                    remediation='Add required tags to the model',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
-                
+            response = self.engine.call(
+                'DescribeModel', self.sagemaker.describe_model, ModelName=model_name
+            )
+            # DescribeModel does not return tags
+            response['Tags'] = self._get_tags(response['ModelArn'])
         except Exception as e:
             print(f"[!] Error checking model {model_name}: {e}")
+            return []
+        return self._evaluate_model(response)
+    
+    def _evaluate_model(self, response: Dict) -> List[SecurityFinding]:
+        """Check a model record for violations"""
+        model_name = response['ModelName']
+        findings = []
+        self._add_record('AWS::SageMaker::Model', response)
+        
+        # Check VPC configuration for sensitive models
+        if not response.get('VpcConfig'):
+            findings.append(self._finding('sagemaker.model.vpc', model_name, response['ModelArn']))
+        
+        # Check tags
+        if not self._has_required_tags(response.get('Tags', [])):
+            findings.append(self._finding('sagemaker.model.tags', model_name, response['ModelArn']))
+        return findings
     
     def scan_endpoints(self) -> None:
         """Scan SageMaker endpoints"""
+        self.sink.extend(self._iter_endpoints())
+    
+    def _iter_endpoints(self) -> Iterator[SecurityFinding]:
+        """Yield endpoint findings"""
         print("[*] Scanning endpoints...")
         
+        if self.state_store:
+            self._load_endpoint_configs()
+        
+        # Endpoint records don't include the config's settings, so both
+        # backends still evaluate the (memoized) endpoint config
+        def search():
+            return self.engine.map(self._evaluate_endpoint, self._search('Endpoint'))
+        
+        def describe():
+            endpoints = self.engine.paginate('ListEndpoints', self.sagemaker.list_endpoints, 'Endpoints')
+            names = (endpoint['EndpointName'] for endpoint in endpoints)
+            return self.engine.map(self._check_endpoint, names)
+        
         try:
-            paginator = self.sagemaker.get_paginator('list_endpoints')
-            for page in paginator.paginate():
-                for endpoint in page['Endpoints']:
-                    self._check_endpoint(endpoint['EndpointName'])
+            for findings in self._inventory('endpoints', search, describe):
+                yield from findings
         except Exception as e:
             print(f"[!] Error scanning endpoints: {e}")
+        
+        if self.state_store:
+            self._save_endpoint_configs()
+        self.scan_metadata['endpoint_config_cache'] = self.endpoint_configs.stats()
     
-    def _check_endpoint(self, endpoint_name: str) -> None:
+    def _check_endpoint(self, endpoint_name: str) -> List[SecurityFinding]:
         """Check individual endpoint for violations"""
         try:
-            response = self.sagemaker.describe_endpoint(
+            response = self.engine.call(
+                'DescribeEndpoint',
+                self.sagemaker.describe_endpoint,
                 EndpointName=endpoint_name
             )
-            
-            # Get endpoint config
-            config_name = response['EndpointConfigName']
-            config = self.sagemaker.describe_endpoint_config(
-                EndpointConfigName=config_name
-            )
+        except Exception as e:
+            print(f"[!] Error checking endpoint {endpoint_name}: {e}")
+            return []
+        return self._evaluate_endpoint(response)
+    
+    def _evaluate_endpoint(self, response: Dict) -> List[SecurityFinding]:
+        """Check an endpoint record for violations"""
+        endpoint_name = response['EndpointName']
+        findings = []
+        try:
+            # Endpoint configs are shared between endpoints, so each is evaluated once
+            config = self._get_endpoint_config_verdict(response['EndpointConfigName'])
             
             # Check encryption
-            if not config.get('KmsKeyId'):
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::Endpoint',
-                    resource_name=endpoint_name,
-                    resource_arn=response['EndpointArn'],
-                    severity='HIGH',
-                    issue='Endpoint does not have KMS encryption',
-                    control='ISO 27001 A.8.24',
-                    remediation='Enable KMS encryption for endpoint',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
+            if not config['kms_encrypted']:
+                findings.append(self._finding('sagemaker.endpoint.kms', endpoint_name, response['EndpointArn']))
             
             # Check data capture (for monitoring)
-            if not config.get('DataCaptureConfig'):
-                self.findings.append(SecurityFinding(
-                    resource_type='AWS::SageMaker::Endpoint',
-                    resource_name=endpoint_name,
-                    resource_arn=response['EndpointArn'],
-                    severity='LOW',
-                    issue='Data capture not configured for monitoring',
-                    control='ISO 42001 9.2.2',
-                    remediation='Enable data capture for model monitoring',
-                    timestamp=datetime.utcnow().isoformat(),
-                    region=self.region
-                ))
+            if not config['data_capture']:
+                findings.append(self._finding('sagemaker.endpoint.data_capture', endpoint_name, response['EndpointArn']))
                 
         except Exception as e:
             print(f"[!] Error checking endpoint {endpoint_name}: {e}")
+        return findings
+    
+    def _get_endpoint_config_verdict(self, config_name: str) -> Dict[str, bool]:
+        """Get the encryption/data capture verdict for an endpoint config"""
+        return self.endpoint_configs.get(
+            config_name, lambda: self._evaluate_endpoint_config(config_name)
+        )
+    
+    def _evaluate_endpoint_config(self, config_name: str) -> Dict[str, bool]:
+        """Describe an endpoint config and evaluate the settings the endpoint checks use"""
+        config = self.engine.call(
+            'DescribeEndpointConfig',
+            self.sagemaker.describe_endpoint_config,
+            EndpointConfigName=config_name
+        )
+        self._add_record('AWS::SageMaker::EndpointConfig', config)
+        return {
+            'kms_encrypted': bool(config.get('KmsKeyId')),
+            'data_capture': bool(config.get('DataCaptureConfig')),
+            'evaluated_at': time.time()
+        }
+    
+    def _load_endpoint_configs(self) -> None:
+        """Seed the endpoint config cache from the state store"""
+        try:
+            state = self.state_store.get(self._endpoint_configs_key()) or {}
+        except Exception as e:
+            print(f"[!] Error loading endpoint config cache: {e}")
+            return
+        
+        # Configs are immutable, but a name can be reused after deletion,
+        # so stored verdicts are only trusted for a limited time
+        cutoff = time.time() - ENDPOINT_CONFIG_MAX_AGE
+        for config_name, verdict in state.get('configs', {}).items():
+            if verdict.get('evaluated_at', 0) >= cutoff:
+                self.endpoint_configs.seed(config_name, verdict)
+    
+    def _save_endpoint_configs(self) -> None:
+        """Persist endpoint config verdicts to the state store"""
+        try:
+            self.state_store.put(self._endpoint_configs_key(), {
+                'configs': self.endpoint_configs.values()
+            }, ttl_seconds=ENDPOINT_CONFIG_MAX_AGE)
+        except Exception as e:
+            print(f"[!] Error saving endpoint config cache: {e}")
+    
+    def _endpoint_configs_key(self) -> str:
+        """State store key for this account and region's endpoint configs"""
+        return f"endpoint-configs#{self._get_account_id()}#{self.region}"
+    
+    def _search(self, resource: str, **kwargs) -> Iterator[Dict]:
+        """Yield full records of one resource type from the Search API"""
+        results = self.engine.paginate(
+            'Search', self.sagemaker.search, 'Results', Resource=resource, MaxResults=100, **kwargs
+        )
+        for result in results:
+            yield result[resource]
+    
+    def _inventory(self, family: str, search: Callable[[], Iterator], describe: Callable[[], Iterator]) -> Iterator:
+        """Yield a family's items from Search, falling back to list/describe if Search is unavailable"""
+        if self.inventory == 'search':
+            started = False
+            try:
+                for item in search():
+                    started = True
+                    yield item
+                self.inventory_backends[family] = 'search'
+                return
+            except Exception as e:
+                # Once results have been emitted a fallback would duplicate them
+                if started:
+                    raise
+                print(f"[!] Search unavailable for {family}, using list/describe: {e}")
+                self.scan_metadata.setdefault('inventory_fallbacks', {})[family] = str(e)
+        
+        self.inventory_backends[family] = 'describe'
+        yield from describe()
+    
+    def _finding(self, rule_id: str, resource_name: str, resource_arn: str) -> SecurityFinding:
+        """Create a finding for a rule in this scan's region"""
+        return SecurityFinding(rule_id, resource_name, resource_arn, self.region, self.timestamp)
+    
+    def _get_account_id(self) -> str:
+        """Get the scanned account ID"""
+        if self._account_id is None:
+            sts = boto3.client('sts', region_name=self.region)
+            self._account_id = sts.get_caller_identity()['Account']
+        return self._account_id
+    
+    def _add_record(self, resource_type: str, record: Dict) -> None:
+        """Keep a described resource for policy evaluation, when collecting them"""
+        if self.record_sink:
+            self.record_sink.extend([(resource_type, strip_response_metadata(record))])
+    
+    def _get_tags(self, resource_arn: str) -> List[Dict]:
+        """Get resource tags from the tag index, falling back to ListTags"""
+        if self.tag_index.loaded:
+            return self.tag_index.get(resource_arn)
+        try:
+            response = self.engine.call('ListTags', self.sagemaker.list_tags, ResourceArn=resource_arn)
+            return response.get('Tags', [])
+        except Exception as e:
+            print(f"[!] Error getting tags for {resource_arn}: {e}")
+            return []
     
     def _has_required_tags(self, tags: List[Dict]) -> bool:
         """Check if resource has required tags"""
@@ -311,15 +598,23 @@ class SageMakerScanner:
         tag_keys = {tag['Key'] for tag in tags}
         return required_tags.issubset(tag_keys)
     
+    def get_api_calls(self) -> Dict[str, int]:
+        """Get the number of AWS API calls made so far, by operation"""
+        calls = {api_name: stats['calls'] for api_name, stats in self.engine.get_stats().items()}
+        if self.tag_index.api_calls:
+            calls['GetResources'] = self.tag_index.api_calls
+        return dict(sorted(calls.items()))
+    
     def export_findings(self, output_file: str = 'sagemaker_findings.json') -> None:
         """Export findings to JSON file"""
-        findings_dict = [asdict(f) for f in self.findings]
+        findings_dict = [f.to_dict() for f in self.findings]
         
         with open(output_file, 'w') as f:
             json.dump({
                 'scan_timestamp': datetime.utcnow().isoformat(),
                 'region': self.region,
                 'total_findings': len(self.findings),
+                'scan_metadata': self.scan_metadata,
                 'severity_breakdown': self._get_severity_breakdown(),
                 'findings': findings_dict
             }, f, indent=2)
@@ -375,11 +670,32 @@ def main():
         default='sagemaker_findings.json',
         help='Output file for findings (default: sagemaker_findings.json)'
     )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='Maximum concurrent describe calls per API (default: 1)'
+    )
+    parser.add_argument(
+        '--state-store',
+        help="Directory or 'dynamodb[:table]' for scan state (training job watermark, endpoint configs)"
+    )
+    parser.add_argument(
+        '--inventory',
+        choices=INVENTORY_BACKENDS,
+        default='search',
+        help='Resource inventory backend; search falls back to describe when unavailable (default: search)'
+    )
     
     args = parser.parse_args()
     
     # Run scan
-    scanner = SageMakerScanner(region=args.region)
+    scanner = SageMakerScanner(
+        region=args.region,
+        concurrency=args.concurrency,
+        state_store=get_state_store(args.state_store),
+        inventory=args.inventory
+    )
     scanner.scan_all()
     scanner.print_summary()
     scanner.export_findings(args.output)
@@ -0,0 +1,125 @@
+"""
+Scan State Store
+Persists small JSON documents between scans (watermarks, cached verdicts)
+either in a local directory or in the DynamoDB cache table
+"""
+
+import gzip
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+import boto3
+
+
+class LocalStateStore:
+    """JSON documents stored as gzip files in a local directory"""
+    
+    def __init__(self, directory: str = '.scan_state'):
+        self.directory = directory
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Get a document, or None if it is missing or expired"""
+        try:
+            with gzip.open(self._path(key), 'rt') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if record.get('expires_at') and record['expires_at'] < time.time():
+            return None
+        return record['value']
+    
+    def put(self, key: str, value: Dict, ttl_seconds: Optional[int] = None) -> None:
+        """Store a document, optionally expiring after ttl_seconds"""
+        os.makedirs(self.directory, exist_ok=True)
+        record = {
+            'value': value,
+            'expires_at': time.time() + ttl_seconds if ttl_seconds else None
+        }
+        # Write then rename so a crashed scan never leaves a truncated file
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt') as f:
+            json.dump(record, f, default=str)
+        os.replace(tmp_path, path)
+    
+    def _path(self, key: str) -> str:
+        """Get the file path for a key"""
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9_.-]', '_', key) + '.json.gz')
+
+
+class DynamoDBStateStore:
+    """JSON documents stored in the DynamoDB cache table (hash key 'key', TTL attribute 'ttl')"""
+    
+    # Documents are gzipped and split to stay under the 400 KB item limit
+    CHUNK_SIZE = 350 * 1024
+    
+    # How long a replaced document's chunks are kept for readers still loading them (seconds)
+    STALE_CHUNK_TTL = 3600
+    
+    def __init__(self, table_name: Optional[str] = None, region: Optional[str] = None):
+        table_name = table_name or os.environ.get('DYNAMODB_CACHE_TABLE')
+        if not table_name:
+            raise ValueError("DynamoDB state store needs a table name or DYNAMODB_CACHE_TABLE")
+        self.table = boto3.resource('dynamodb', region_name=region).Table(table_name)
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Get a document, or None if it is missing or expired"""
+        manifest = self.table.get_item(Key={'key': key}).get('Item')
+        # DynamoDB deletes expired items lazily, so check the TTL as well
+        if not manifest or ('ttl' in manifest and int(manifest['ttl']) < time.time()):
+            return None
+        
+        data = b''
+        for i in range(int(manifest['chunks'])):
+            chunk = self.table.get_item(Key={'key': self._chunk_key(key, manifest['generation'], i)}).get('Item')
+            if not chunk:
+                return None
+            data += chunk['data'].value
+        return json.loads(gzip.decompress(data))
+    
+    def put(self, key: str, value: Dict, ttl_seconds: Optional[int] = None) -> None:
+        """Store a document, optionally expiring after ttl_seconds"""
+        data = gzip.compress(json.dumps(value, default=str).encode())
+        chunks = [data[i:i + self.CHUNK_SIZE] for i in range(0, len(data), self.CHUNK_SIZE)] or [b'']
+        extra = {'ttl': int(time.time() + ttl_seconds)} if ttl_seconds else {}
+        
+        # Each write gets its own generation of chunks and the manifest is flipped to it
+        # last, so a concurrent reader sees either the old document or the new one
+        generation = uuid.uuid4().hex
+        for i, chunk in enumerate(chunks):
+            self.table.put_item(Item={'key': self._chunk_key(key, generation, i), 'data': chunk, **extra})
+        previous = self.table.put_item(
+            Item={'key': key, 'chunks': len(chunks), 'generation': generation, **extra},
+            ReturnValues='ALL_OLD'
+        ).get('Attributes')
+        
+        # The replaced chunks expire shortly instead of being deleted under a reader
+        if previous and 'generation' in previous:
+            expires = int(time.time() + self.STALE_CHUNK_TTL)
+            for i in range(int(previous['chunks'])):
+                self.table.update_item(
+                    Key={'key': self._chunk_key(key, previous['generation'], i)},
+                    UpdateExpression='SET #ttl = :ttl',
+                    ExpressionAttributeNames={'#ttl': 'ttl'},
+                    ExpressionAttributeValues={':ttl': expires}
+                )
+    
+    def _chunk_key(self, key: str, generation: str, index: int) -> str:
+        """Get the item key of one chunk of a document generation"""
+        return f"{key}#{generation}#{index}"
+
+
+def get_state_store(spec: Optional[str]):
+    """Create a state store from 'dynamodb', 'dynamodb:<table>' or a local directory path"""
+    if not spec:
+        return None
+    if spec == 'dynamodb':
+        return DynamoDBStateStore()
+    if spec.startswith('dynamodb:'):
+        return DynamoDBStateStore(table_name=spec.split(':', 1)[1])
+    return LocalStateStore(spec)
@@ -0,0 +1,50 @@
+"""
+Bulk Tag Index
+Loads tags for a whole region through the Resource Groups Tagging API
+so scanners don't need one tagging call per resource
+"""
+
+from typing import Dict, List
+
+import boto3
+
+
+class TagIndex:
+    """Region-wide index of resource tags keyed by ARN"""
+    
+    def __init__(self, region: str, resource_types: List[str], client=None):
+        self.region = region
+        self.resource_types = resource_types
+        self.client = client or boto3.client('resourcegroupstaggingapi', region_name=region)
+        self.loaded = False
+        self.api_calls = 0
+        self._tags: Dict[str, List[Dict]] = {}
+    
+    def load(self) -> bool:
+        """Load tags for every matching resource in the region, returning False if the API is unavailable"""
+        try:
+            paginator = self.client.get_paginator('get_resources')
+            for page in paginator.paginate(
+                ResourceTypeFilters=self.resource_types,
+                ResourcesPerPage=100
+            ):
+                self.api_calls += 1
+                for mapping in page['ResourceTagMappingList']:
+                    self._tags[mapping['ResourceARN'].lower()] = mapping.get('Tags', [])
+            self.loaded = True
+        except Exception as e:
+            print(f"[!] Tag index unavailable in {self.region}, using per-resource tag calls: {e}")
+            self._tags = {}
+        return self.loaded
+    
+    def get(self, resource_arn: str) -> List[Dict]:
+        """Get tags for a resource (ARNs match case-insensitively, as SageMaker lower-cases some names)"""
+        return self._tags.get(resource_arn.lower(), [])
+    
+    def stats(self) -> Dict:
+        """Get index size and API call count"""
+        return {
+            'loaded': self.loaded,
+            'resources': len(self._tags),
+            'api_calls': self.api_calls
+        }
@@ -6,24 +6,72 @@ Runs all scanners and generates consolidated report
 
 import argparse
 import json
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 from scanners import SageMakerScanner, IAMScanner, S3Scanner
+from scanners.access_graph import AccessGraph
+from scanners.html_report import write_html_report
+from scanners.sagemaker_scanner import INVENTORY_BACKENDS
+from scanners.regions import fan_out, resolve_regions, split_concurrency
+from scanners.results_stream import ResultsWriter, is_stream_path, iter_findings
+from scanners.opa_evaluator import OPAEvaluator, to_policy_inputs
+from scanners.state_store import get_state_store
 
 
 class UnifiedScanner:
     """Runs all scanners and consolidates results"""
     
-    def __init__(self, region: str = 'us-east-1'):
+    # S3 scanner and report wording; scan_all_buckets.py overrides these to scan every bucket
+    s3_scanner_class = S3Scanner
+    s3_scanner_label = 'S3'
+    scan_mode: Optional[str] = None
+    title_suffix = ''
+    report_title = 'AWS AI Governance Scan Report'
+    report_badge: Optional[str] = None
+    report_scan_mode: Optional[str] = None
+    description = 'Run unified AWS AI governance security scan'
+    default_output = 'governance_scan_results.json'
+    default_html = 'governance_scan_report.html'
+    
+    def __init__(self, region: str = 'us-east-1', concurrency: int = 1, state_store: str = None,
+                 inventory: str = 'search', regions: List[str] = None, unused_services: bool = False,
+                 evaluate_policies: bool = False, results_writer: Optional[ResultsWriter] = None):
         self.region = region
+        # SageMaker is regional; IAM and S3 are scanned once from the home region
+        self.regions = regions or [region]
+        self.concurrency = concurrency
+        self.state_store = state_store
+        self.inventory = inventory
+        self.unused_services = unused_services
+        self.evaluate_policies = evaluate_policies
+        # Optional NDJSON writer that receives each finding as the scanners produce it
+        self.results_writer = results_writer
+        # (resource type, AWS record) pairs from the SageMaker regions, only collected for OPA evaluation
+        self.resource_records = []
+        # Role/policy/bucket index built from the IAM and S3 results for offline queries
+        self.access_graph = None
+        # Scanner instances by name, kept so API call counts survive a failed scan
+        self.scanners = {'sagemaker': [], 'iam': [], 's3': []}
         self.all_findings = []
+        # Findings as they were collected, kept in memory only when not streaming them
+        self.findings_by_scanner: Dict[str, List[Dict]] = {}
+        # Running totals for the summary, so it matches what was written even if a scanner fails
+        self.finding_counts: Dict[str, int] = {}
+        self.region_finding_counts: Dict[str, int] = {}
+        self.severity_counts: Dict[str, int] = {}
+        self.control_counts: Dict[str, int] = {}
+        self._findings_lock = threading.Lock()
     
     def run_all_scans(self) -> Dict:
         """Run all scanners"""
         print("\n" + "="*70)
-        print("AWS AI GOVERNANCE FRAMEWORK - UNIFIED SECURITY SCAN")
+        print(f"AWS AI GOVERNANCE FRAMEWORK - UNIFIED SECURITY SCAN{self.title_suffix}")
         print("="*70)
         print(f"Region: {self.region}")
+        if self.regions != [self.region]:
+            print(f"SageMaker Regions: {', '.join(self.regions)}")
         print(f"Timestamp: {datetime.utcnow().isoformat()}")
         print("="*70 + "\n")
         
@@ -31,85 +79,190 @@ class UnifiedScanner:
             'scan_metadata': {
                 'timestamp': datetime.utcnow().isoformat(),
                 'region': self.region,
-                'scanners_run': []
+                'regions': {},
+                'concurrency': self.concurrency,
+                'scanners_run': ['SageMaker', 'IAM', self.s3_scanner_label],
+                'scanners': {},
+                'scanner_metadata': {}
             },
             'findings_by_scanner': {},
             'consolidated_findings': [],
             'summary': {}
         }
+        if self.scan_mode:
+            results['scan_metadata']['scan_mode'] = self.scan_mode
         
-        # Run SageMaker scanner
-        print("\n[1/3] Running SageMaker Scanner...")
-        sagemaker_scanner = SageMakerScanner(region=self.region)
-        sagemaker_findings = sagemaker_scanner.scan_all()
-        results['findings_by_scanner']['sagemaker'] = [
-            self._finding_to_dict(f) for f in sagemaker_findings
-        ]
-        results['scan_metadata']['scanners_run'].append('SageMaker')
+        # The scanners call different services with their own rate limits, so they run
+        # side by side and the scan takes as long as the slowest one rather than the sum
+        print(f"\n[*] Running SageMaker, IAM and S3{self.title_suffix} scanners in parallel...")
+        start = time.monotonic()
+        self.scanners = {'sagemaker': [], 'iam': [], 's3': []}
+        self.resource_records = []
+        self.findings_by_scanner = {name: [] for name in self.scanners}
+        self.finding_counts = dict.fromkeys(self.scanners, 0)
+        self.region_finding_counts = dict.fromkeys(self.regions, 0)
+        self.severity_counts = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
+        self.control_counts = {}
+        scans = {
+            'sagemaker': self._scan_sagemaker_regions,
+            'iam': self._scan_iam,
+            's3': self._scan_s3
+        }
+        outcomes = fan_out(lambda name: scans[name](results), list(scans), len(scans))
+        results['scan_metadata']['duration_seconds'] = round(time.monotonic() - start, 3)
         
-        # Run IAM scanner
-        print("\n[2/3] Running IAM Scanner...")
-        iam_scanner = IAMScanner()
-        iam_findings = iam_scanner.scan_all()
-        results['findings_by_scanner']['iam'] = [
-            self._finding_to_dict(f) for f in iam_findings
-        ]
-        results['scan_metadata']['scanners_run'].append('IAM')
+        # A failed scanner reports its error; every finding it produced before
+        # failing is kept, as it has already been counted (and streamed)
+        for name, outcome in outcomes.items():
+            api_calls = self._get_api_calls(name)
+            results['findings_by_scanner'][name] = self.findings_by_scanner[name]
+            results['scan_metadata']['scanners'][name] = {
+                'duration_seconds': outcome['duration_seconds'],
+                'findings': self.finding_counts[name],
+                'api_calls': sum(api_calls.values()),
+                'api_calls_by_operation': api_calls,
+                'error': outcome['error']
+            }
         
-        # Run S3 scanner
-        print("\n[3/3] Running S3 Scanner...")
-        s3_scanner = S3Scanner(region=self.region)
-        s3_findings = s3_scanner.scan_all()
-        results['findings_by_scanner']['s3'] = [
-            self._finding_to_dict(f) for f in s3_findings
-        ]
-        results['scan_metadata']['scanners_run'].append('S3')
+        iam_scanner = next(iter(self.scanners['iam']), None)
+        s3_scanner = next(iter(self.scanners['s3']), None)
+        self.access_graph = iam_scanner.build_access_graph() if iam_scanner else AccessGraph()
+        if s3_scanner:
+            s3_scanner.add_to_access_graph(self.access_graph)
+        results['scan_metadata']['access_graph'] = self.access_graph.stats()
+        
+        if self.evaluate_policies:
+            print("\n[*] Evaluating OPA policies against the collected inventory...")
+            results['policy_evaluation'] = self._evaluate_policies(iam_scanner, s3_scanner)
         
-        # Consolidate findings
-        self.all_findings = sagemaker_findings + iam_findings + s3_findings
-        results['consolidated_findings'] = [
-            self._finding_to_dict(f) for f in self.all_findings
+        # Consolidate findings in scanner order (the per-scanner lists share the same dicts)
+        self.all_findings = [
+            finding for findings in results['findings_by_scanner'].values() for finding in findings
         ]
+        results['consolidated_findings'] = self.all_findings
         
         # Generate summary
         results['summary'] = self._generate_summary()
         
         return results
     
+    def _scan_sagemaker_regions(self, results: Dict) -> None:
+        """Scan SageMaker in every region in parallel, recording per-region timing"""
+        # The concurrency budget is shared: regions run side by side and
+        # each gets an equal slice for its describe calls
+        budget = split_concurrency(self.concurrency, len(self.regions))
+        
+        def scan_region(region: str):
+            scanner = SageMakerScanner(
+                region=region,
+                concurrency=budget['per_region'],
+                state_store=get_state_store(self.state_store),
+                inventory=self.inventory,
+                collect_records=self.evaluate_policies
+            )
+            self.scanners['sagemaker'].append(scanner)
+            self._collect(scanner, 'sagemaker', region)
+            return scanner.scan_metadata, scanner.resource_records
+        
+        outcomes = fan_out(scan_region, self.regions, budget['region_workers'])
+        
+        scanner_metadata = {}
+        for region, outcome in outcomes.items():
+            metadata, records = outcome['result'] or ({}, [])
+            self.resource_records.extend(records)
+            scanner_metadata[region] = metadata
+            results['scan_metadata']['regions'][region] = {
+                'duration_seconds': outcome['duration_seconds'],
+                'findings': self.region_finding_counts[region],
+                'error': outcome['error']
+            }
+        results['scan_metadata']['scanner_metadata']['sagemaker'] = scanner_metadata
+    
+    def _scan_iam(self, results: Dict) -> None:
+        """Scan IAM roles"""
+        iam_scanner = IAMScanner(
+            state_store=get_state_store(self.state_store),
+            concurrency=self.concurrency,
+            unused_services=self.unused_services,
+            collect_records=self.evaluate_policies
+        )
+        self.scanners['iam'].append(iam_scanner)
+        self._collect(iam_scanner, 'iam')
+        results['scan_metadata']['scanner_metadata']['iam'] = iam_scanner.scan_metadata
+    
+    def _scan_s3(self, results: Dict) -> None:
+        """Scan S3 buckets"""
+        s3_scanner = self.s3_scanner_class(region=self.region, concurrency=self.concurrency)
+        self.scanners['s3'].append(s3_scanner)
+        self._collect(s3_scanner, 's3')
+        results['scan_metadata']['scanner_metadata']['s3'] = s3_scanner.scan_metadata
+    
+    def _get_api_calls(self, name: str) -> Dict[str, int]:
+        """Sum a scanner's API calls by operation across its instances (one per SageMaker region)"""
+        calls = {}
+        for scanner in self.scanners[name]:
+            for operation, count in scanner.get_api_calls().items():
+                calls[operation] = calls.get(operation, 0) + count
+        return dict(sorted(calls.items()))
+    
+    def _evaluate_policies(self, iam_scanner, s3_scanner) -> Dict:
+        """Evaluate the Rego policy bundle against every resource the scanners collected"""
+        records = list(self.resource_records)
+        if iam_scanner:
+            records += iam_scanner.resource_records
+        if s3_scanner:
+            records += s3_scanner.get_resource_records()
+        inputs = [doc for resource_type, record in records for doc in to_policy_inputs(resource_type, record)]
+        try:
+            with OPAEvaluator() as evaluator:
+                violations = evaluator.evaluate(inputs)
+        except Exception as e:
+            print(f"[!] Error evaluating OPA policies: {e}")
+            return {'violations': [], 'error': str(e)}
+        return {'violations': violations, 'metadata': evaluator.scan_metadata}
+    
+    def _collect(self, scanner, name: str, region: Optional[str] = None) -> None:
+        """Consume a scanner's findings as they are produced, expanding each to its exported dict once"""
+        for finding in scanner.iter_findings():
+            self._record_finding(name, self._finding_to_dict(finding), region)
+    
+    def _record_finding(self, name: str, finding: Dict, region: Optional[str] = None) -> None:
+        """Count a finding for the summary and stream it, or keep it when not streaming"""
+        with self._findings_lock:
+            if self.results_writer:
+                self.results_writer.write_finding(name, finding)
+            else:
+                self.findings_by_scanner[name].append(finding)
+            
+            self.finding_counts[name] += 1
+            if region:
+                self.region_finding_counts[region] += 1
+            severity = finding.get('severity', 'UNKNOWN')
+            self.severity_counts[severity] = self.severity_counts.get(severity, 0) + 1
+            for ctrl in finding.get('control', 'UNKNOWN').split(','):
+                ctrl = ctrl.strip()
+                self.control_counts[ctrl] = self.control_counts.get(ctrl, 0) + 1
+    
     def _finding_to_dict(self, finding) -> Dict:
-        """Convert finding dataclass to dict"""
-        if hasattr(finding, '__dict__'):
-            return finding.__dict__
+        """Expand a compact finding to its exported dict"""
+        if hasattr(finding, 'to_dict'):
+            return finding.to_dict()
         return finding
     
     def _generate_summary(self) -> Dict:
-        """Generate summary statistics"""
-        severity_counts = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
-        control_counts = {}
-        
-        for finding in self.all_findings:
-            # Count by severity
-            severity = getattr(finding, 'severity', 'UNKNOWN')
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
-            
-            # Count by control
-            control = getattr(finding, 'control', 'UNKNOWN')
-            for ctrl in control.split(','):
-                ctrl = ctrl.strip()
-                control_counts[ctrl] = control_counts.get(ctrl, 0) + 1
-        
+        """Generate summary statistics from the counts kept as findings were collected"""
         # Get top violated controls
         top_controls = sorted(
-            control_counts.items(),
+            self.control_counts.items(),
             key=lambda x: x[1],
             reverse=True
         )[:10]
         
         return {
-            'total_findings': len(self.all_findings),
-            'severity_breakdown': severity_counts,
+            'total_findings': sum(self.finding_counts.values()),
+            'severity_breakdown': dict(self.severity_counts),
             'top_violated_controls': dict(top_controls),
-            'risk_score': self._calculate_risk_score(severity_counts)
+            'risk_score': self._calculate_risk_score(self.severity_counts)
         }
     
     def _calculate_risk_score(self, severity_counts: Dict) -> int:
@@ -127,7 +280,7 @@ class UnifiedScanner:
         summary = results['summary']
         
         print("\n" + "="*70)
-        print("CONSOLIDATED SCAN SUMMARY")
+        print(f"CONSOLIDATED SCAN SUMMARY{self.title_suffix}")
         print("="*70)
         print(f"Total Findings: {summary['total_findings']}")
         print(f"Risk Score: {summary['risk_score']}/100")
@@ -143,164 +296,140 @@ class UnifiedScanner:
             print(f"  {i}. {control}: {count} violations")
         
         print("\nFindings by Scanner:")
-        for scanner, findings in results['findings_by_scanner'].items():
-            print(f"  {scanner.upper():12s}: {len(findings)} findings")
+        for scanner, stats in results['scan_metadata']['scanners'].items():
+            status = f"ERROR: {stats['error']}" if stats['error'] else f"{stats['findings']} findings"
+            print(f"  {scanner.upper():12s}: {status} ({stats['duration_seconds']}s, {stats['api_calls']} API calls)")
+        print(f"  Wall time   : {results['scan_metadata']['duration_seconds']}s")
+        
+        print("\nSageMaker by Region:")
+        for region, stats in results['scan_metadata']['regions'].items():
+            status = f"ERROR: {stats['error']}" if stats['error'] else f"{stats['findings']} findings"
+            print(f"  {region:16s}: {status} ({stats['duration_seconds']}s)")
+        
+        if 'policy_evaluation' in results:
+            evaluation = results['policy_evaluation']
+            print("\nOPA Policy Evaluation:")
+            if evaluation.get('error'):
+                print(f"  ERROR: {evaluation['error']}")
+            else:
+                metadata = evaluation['metadata']
+                print(f"  {len(evaluation['violations'])} violations across {metadata['inputs']} inputs "
+                      f"({metadata['inputs_per_second']} inputs/sec)")
+                for package, stats in metadata['packages'].items():
+                    print(f"  {package:24s}: {stats['violations']} violations, "
+                          f"{stats['resources']} inputs in {stats['seconds']}s")
         
         print("="*70 + "\n")
     
     def export_results(self, results: Dict, output_file: str) -> None:
-        """Export results to JSON"""
-        with open(output_file, 'w') as f:
-            json.dump(results, f, indent=2, default=str)
+        """Export results to JSON, or finish the NDJSON file the findings were streamed to"""
+        if self.results_writer:
+            self.results_writer.close(results)
+        else:
+            with open(output_file, 'w') as f:
+                json.dump(results, f, indent=2, default=str)
         print(f"[+] Results exported to {output_file}")
     
     def generate_html_report(self, results: Dict, output_file: str) -> None:
-        """Generate HTML report"""
-        html = self._create_html_report(results)
-        with open(output_file, 'w') as f:
-            f.write(html)
-        print(f"[+] HTML report generated: {output_file}")
-    
-    def _create_html_report(self, results: Dict) -> str:
-        """Create HTML report content"""
-        summary = results['summary']
-        
-        html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>AWS AI Governance Scan Report</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 20px; }}
-        h1 {{ color: #232f3e; }}
-        h2 {{ color: #ff9900; }}
-        .summary {{ background: #f0f0f0; padding: 15px; border-radius: 5px; }}
-        .critical {{ color: #d13212; font-weight: bold; }}
-        .high {{ color: #ff9900; font-weight: bold; }}
-        .medium {{ color: #1d8102; }}
-        .low {{ color: #879596; }}
-        table {{ border-collapse: collapse; width: 100%; margin: 20px 0; }}
-        th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; }}
-        th {{ background-color: #232f3e; color: white; }}
-        tr:nth-child(even) {{ background-color: #f9f9f9; }}
-        .risk-score {{ font-size: 48px; font-weight: bold; }}
-    </style>
-</head>
-<body>
-    <h1>AWS AI Governance Framework - Security Scan Report</h1>
-    
-    <div class="summary">
-        <h2>Executive Summary</h2>
-        <p><strong>Scan Date:</strong> {results['scan_metadata']['timestamp']}</p>
-        <p><strong>Region:</strong> {results['scan_metadata']['region']}</p>
-        <p><strong>Total Findings:</strong> {summary['total_findings']}</p>
-        <p><strong>Risk Score:</strong> <span class="risk-score">{summary['risk_score']}/100</span></p>
-    </div>
-    
-    <h2>Severity Breakdown</h2>
-    <table>
-        <tr>
-            <th>Severity</th>
-            <th>Count</th>
-        </tr>
-        <tr>
-            <td class="critical">CRITICAL</td>
-            <td>{summary['severity_breakdown'].get('CRITICAL', 0)}</td>
-        </tr>
-        <tr>
-            <td class="high">HIGH</td>
-            <td>{summary['severity_breakdown'].get('HIGH', 0)}</td>
-        </tr>
-        <tr>
-            <td class="medium">MEDIUM</td>
-            <td>{summary['severity_breakdown'].get('MEDIUM', 0)}</td>
-        </tr>
-        <tr>
-            <td class="low">LOW</td>
-            <td>{summary['severity_breakdown'].get('LOW', 0)}</td>
-        </tr>
-    </table>
-    
-    <h2>Top Violated Controls</h2>
-    <table>
-        <tr>
-            <th>Control</th>
-            <th>Violations</th>
-        </tr>
-"""
-        
-        for control, count in list(summary['top_violated_controls'].items())[:10]:
-            html += f"        <tr><td>{control}</td><td>{count}</td></tr>\n"
-        
-        html += """
-    </table>
-    
-    <h2>Detailed Findings</h2>
-"""
-        
-        for scanner, findings in results['findings_by_scanner'].items():
-            html += f"    <h3>{scanner.upper()} Scanner ({len(findings)} findings)</h3>\n"
-            if findings:
-                html += """    <table>
-        <tr>
-            <th>Severity</th>
-            <th>Resource</th>
-            <th>Issue</th>
-            <th>Control</th>
-        </tr>
-"""
-                for finding in findings[:20]:  # Limit to first 20
-                    severity_class = finding.get('severity', 'LOW').lower()
-                    resource_name = finding.get('resource_name') or finding.get('role_name') or finding.get('bucket_name', 'N/A')
-                    html += f"""        <tr>
-            <td class="{severity_class}">{finding.get('severity', 'UNKNOWN')}</td>
-            <td>{resource_name}</td>
-            <td>{finding.get('issue', 'N/A')}</td>
-            <td>{finding.get('control', 'N/A')}</td>
-        </tr>
-"""
-                html += "    </table>\n"
-        
-        html += """
-</body>
-</html>
-"""
-        return html
+        """Generate HTML report with every finding, paginated in the browser"""
+        # Streamed findings are read back from the (closed) results file rather than held in memory
+        findings = iter_findings(self.results_writer.path) if self.results_writer else None
+        count = write_html_report(
+            output_file,
+            results,
+            findings,
+            title=self.report_title,
+            badge=self.report_badge,
+            scan_mode=self.report_scan_mode
+        )
+        print(f"[+] HTML report generated: {output_file} ({count} findings)")
 
 
-def main():
+def main(scanner_class=UnifiedScanner):
     """Main entry point"""
     parser = argparse.ArgumentParser(
-        description='Run unified AWS AI governance security scan'
+        description=scanner_class.description
     )
     parser.add_argument(
         '--region',
         default='us-east-1',
         help='AWS region to scan (default: us-east-1)'
     )
+    parser.add_argument(
+        '--regions',
+        help="SageMaker regions: 'all' enabled regions or a comma-separated list (default: --region)"
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='Maximum concurrent S3 checks, IAM role fetches, and SageMaker describe calls across all regions (default: 1)'
+    )
+    parser.add_argument(
+        '--state-store',
+        help="Directory or 'dynamodb[:table]' for scan state (training job watermark, endpoint configs, IAM policy and access data)"
+    )
+    parser.add_argument(
+        '--inventory',
+        choices=INVENTORY_BACKENDS,
+        default='search',
+        help='SageMaker inventory backend; search falls back to describe when unavailable (default: search)'
+    )
+    parser.add_argument(
+        '--unused-services',
+        action='store_true',
+        help='Report services each IAM role is allowed but has not used in 90 days'
+    )
     parser.add_argument(
         '--output',
-        default='governance_scan_results.json',
-        help='Output JSON file (default: governance_scan_results.json)'
+        default=scanner_class.default_output,
+        help=f'Output file (default: {scanner_class.default_output}); .ndjson or .ndjson.gz streams findings as they are found'
     )
     parser.add_argument(
         '--html',
-        default='governance_scan_report.html',
-        help='Output HTML report (default: governance_scan_report.html)'
+        default=scanner_class.default_html,
+        help=f'Output HTML report (default: {scanner_class.default_html})'
+    )
+    parser.add_argument(
+        '--opa',
+        action='store_true',
+        help='Also evaluate the policies/*.rego bundle against the collected inventory (requires the opa binary)'
+    )
+    parser.add_argument(
+        '--graph-output',
+        help='Write the IAM/S3 access graph here (.json or .json.gz) for python -m scanners.access_graph'
     )
     
     args = parser.parse_args()
     
-    # Run unified scan
-    scanner = UnifiedScanner(region=args.region)
-    results = scanner.run_all_scans()
-    
-    # Print summary
-    scanner.print_summary(results)
-    
-    # Export results
-    scanner.export_results(results, args.output)
+    # Findings stream straight to an NDJSON output; the writer is closed even if the
+    # scan fails, so a gzip file stays readable up to the last finding written
+    results_writer = ResultsWriter(args.output) if is_stream_path(args.output) else None
+    try:
+        # Run unified scan
+        scanner = scanner_class(
+            region=args.region,
+            concurrency=args.concurrency,
+            state_store=args.state_store,
+            inventory=args.inventory,
+            regions=resolve_regions(args.regions, args.region),
+            unused_services=args.unused_services,
+            evaluate_policies=args.opa,
+            results_writer=results_writer
+        )
+        results = scanner.run_all_scans()
+        
+        # Print summary
+        scanner.print_summary(results)
+        
+        # Export results
+        scanner.export_results(results, args.output)
+    finally:
+        if results_writer:
+            results_writer.close()
     scanner.generate_html_report(results, args.html)
+    if args.graph_output:
+        scanner.access_graph.save(args.graph_output)
     
     print("\n[+] Scan complete!")
     print(f"[+] View detailed results: {args.output}")
@@ -0,0 +1,25 @@
+"""
+Shared pytest setup: makes the scanners package importable from the repository root
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    """Run the test against moto's in-memory AWS account"""
+    moto = pytest.importorskip('moto')
+    for name, value in {
+        'AWS_ACCESS_KEY_ID': 'testing',
+        'AWS_SECRET_ACCESS_KEY': 'testing',
+        'AWS_SESSION_TOKEN': 'testing',
+        'AWS_DEFAULT_REGION': 'us-east-1'
+    }.items():
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        yield
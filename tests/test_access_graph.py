@@ -0,0 +1,103 @@
+"""
+Tests for the offline access graph
+"""
+
+from scanners.access_graph import AccessGraph
+
+BUCKET = 'arn:aws:s3:::training-data'
+
+
+def _graph(**roles) -> AccessGraph:
+    """Build a graph with one inline policy per role"""
+    graph = AccessGraph()
+    for name, statements in roles.items():
+        graph.add_role(f"arn:aws:iam::123456789012:role/{name}", name, [('inline', {'Statement': statements})])
+    return graph
+
+
+def _role_with_policies(graph: AccessGraph, name: str, *policies) -> None:
+    """Add a role with one managed policy per statement list"""
+    graph.add_role(f"arn:aws:iam::123456789012:role/{name}", name, [
+        (f"arn:aws:iam::123456789012:policy/{name}-{i}", {'Statement': statements})
+        for i, statements in enumerate(policies)
+    ])
+
+
+def _names(matches):
+    return [match['role_name'] for match in matches]
+
+
+def test_partial_deny_does_not_hide_role_without_action():
+    graph = _graph(R=[
+        {'Effect': 'Allow', 'Action': 's3:*', 'Resource': [BUCKET, BUCKET + '/*']},
+        {'Effect': 'Deny', 'Action': 's3:DeleteBucket', 'Resource': '*'}
+    ])
+    assert _names(graph.who_can_reach(BUCKET)) == ['R']
+    assert _names(graph.who_can_reach(BUCKET, 's3:GetObject')) == ['R']
+    assert graph.who_can_reach(BUCKET, 's3:DeleteBucket') == []
+
+
+def test_service_wide_deny_removes_role():
+    graph = _graph(
+        Denied=[
+            {'Effect': 'Allow', 'Action': 's3:GetObject', 'Resource': BUCKET + '/*'},
+            {'Effect': 'Deny', 'Action': 's3:*', 'Resource': '*'}
+        ],
+        NotActionDeny=[
+            {'Effect': 'Allow', 'Action': '*', 'Resource': '*'},
+            {'Effect': 'Deny', 'NotAction': 'iam:*', 'Resource': '*'}
+        ]
+    )
+    assert graph.who_can_reach(BUCKET) == []
+
+
+def test_object_grant_reaches_bucket_and_conditions_are_flagged():
+    graph = _graph(Reader=[
+        {'Effect': 'Allow', 'Action': 's3:GetObject', 'Resource': BUCKET + '/*',
+         'Condition': {'Bool': {'aws:SecureTransport': 'true'}}}
+    ])
+    [match] = graph.who_can_reach(BUCKET)
+    assert match['role_name'] == 'Reader'
+    assert match['conditional'] is True
+    assert graph.who_can_reach('arn:aws:s3:::other-bucket') == []
+
+
+def test_deny_on_objects_only_keeps_bucket_reachable():
+    graph = _graph(R=[
+        {'Effect': 'Allow', 'Action': 's3:*', 'Resource': '*'},
+        {'Effect': 'Deny', 'Action': 's3:*', 'Resource': BUCKET + '/*'}
+    ])
+    assert _names(graph.who_can_reach(BUCKET, 's3:ListBucket')) == ['R']
+
+
+def test_save_and_load_round_trip(tmp_path):
+    graph = _graph(R=[{'Effect': 'Allow', 'Action': 's3:GetObject', 'Resource': BUCKET + '/*'}])
+    graph.add_resource(BUCKET, 'AWS::S3::Bucket')
+    path = str(tmp_path / 'graph.json.gz')
+    graph.save(path)
+    loaded = AccessGraph.load(path)
+    assert loaded.who_can_reach(BUCKET) == graph.who_can_reach(BUCKET)
+    assert loaded.reachable_resources('R') == [BUCKET]
+
+
+def test_deny_in_one_policy_applies_to_allow_from_another():
+    graph = AccessGraph()
+    allow = [{'Effect': 'Allow', 'Action': 's3:*', 'Resource': '*'}]
+    _role_with_policies(graph, 'Denied', allow, [{'Effect': 'Deny', 'Action': 's3:*', 'Resource': '*'}])
+    _role_with_policies(graph, 'Allowed', allow)
+    assert _names(graph.who_can_reach(BUCKET)) == ['Allowed']
+    assert _names(graph.who_can_reach(BUCKET, 's3:GetObject')) == ['Allowed']
+
+
+def test_conditional_deny_in_another_policy_flags_role():
+    graph = AccessGraph()
+    _role_with_policies(
+        graph, 'R',
+        [{'Effect': 'Allow', 'Action': 's3:GetObject', 'Resource': BUCKET + '/*'}],
+        [{'Effect': 'Deny', 'Action': 's3:*', 'Resource': '*',
+          'Condition': {'Bool': {'aws:SecureTransport': 'false'}}}]
+    )
+    [match] = graph.who_can_reach(BUCKET, 's3:GetObject')
+    assert match['conditional'] is True
+    assert [path['policy'] for path in match['paths']] == ['arn:aws:iam::123456789012:policy/R-0']
+    assert all(path['conditional'] for path in match['paths'])
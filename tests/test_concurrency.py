@@ -0,0 +1,160 @@
+"""
+Tests for the shared concurrency helpers
+"""
+
+import threading
+import time
+
+import pytest
+
+from scanners.concurrency import Memo, ProgressMeter, TokenBucket, iter_as_completed, iter_ordered
+
+
+def test_token_bucket_limits_rate_after_burst():
+    bucket = TokenBucket(rate=20, burst=1)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    # The first token is in the bucket; the other four refill at 20/sec
+    assert time.monotonic() - start >= 0.15
+
+
+def test_token_bucket_below_one_call_per_second():
+    bucket = TokenBucket(rate=0.5)
+    assert bucket.capacity == 1.0
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start < 0.5
+
+
+def test_token_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_progress_meter_reports_every_and_at_end(capsys):
+    meter = ProgressMeter(total=5, label='roles', every=2)
+    for _ in range(5):
+        meter.tick()
+    
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split(' (')[0] for line in lines] == ['[*] 2/5 roles', '[*] 4/5 roles', '[*] 5/5 roles']
+    assert meter.done == 5
+    assert meter.rate() > 0
+
+
+def test_memo_computes_each_key_once_across_threads():
+    memo = Memo()
+    calls = []
+    barrier = threading.Barrier(8)
+    
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'value'
+    
+    def lookup(results):
+        barrier.wait()
+        results.append(memo.get('key', compute))
+    
+    results = []
+    threads = [threading.Thread(target=lookup, args=(results,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+    assert memo.stats() == {'hits': 7, 'misses': 1, 'hit_rate': 0.875}
+
+
+def test_memo_caches_errors():
+    memo = Memo()
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        raise KeyError('missing')
+    
+    for _ in range(2):
+        with pytest.raises(KeyError):
+            memo.get('key', compute)
+    assert len(calls) == 1
+    assert memo.values() == {}
+
+
+def test_iter_ordered_keeps_input_order():
+    def slow_square(n):
+        time.sleep(0.01 * (5 - n))
+        return n * n
+    
+    assert list(iter_ordered(slow_square, range(5), max_workers=4)) == [0, 1, 4, 9, 16]
+
+
+def test_iter_as_completed_tags_every_item():
+    streams = {'a': iter([1, 2]), 'b': iter([3]), 'c': iter([])}
+    assert sorted(iter_as_completed(streams)) == [('a', 1), ('a', 2), ('b', 3)]
+
+
+def test_iter_as_completed_bounds_the_buffer():
+    produced = []
+    
+    def stream():
+        for i in range(100):
+            produced.append(i)
+            yield i
+    
+    items = iter_as_completed({'a': stream()}, buffer_size=5)
+    assert next(items) == ('a', 0)
+    time.sleep(0.1)
+    # Five buffered items plus one waiting to be put, beyond the one consumed
+    assert len(produced) <= 7
+
+
+def test_iter_as_completed_raises_stream_errors():
+    def failing():
+        yield 1
+        raise RuntimeError('listing failed')
+    
+    items = iter_as_completed({'a': failing()})
+    assert next(items) == ('a', 1)
+    with pytest.raises(RuntimeError, match='listing failed'):
+        next(items)
+
+
+def test_iter_as_completed_stops_producers_when_consumer_stops():
+    closed = []
+    
+    def endless():
+        try:
+            while True:
+                yield 1
+        finally:
+            closed.append(True)
+    
+    before = threading.active_count()
+    items = iter_as_completed({'a': endless(), 'b': endless()}, buffer_size=2)
+    assert next(items) in (('a', 1), ('b', 1))
+    items.close()
+    
+    deadline = time.monotonic() + 2
+    while threading.active_count() > before and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert threading.active_count() == before
+    assert closed == [True, True]
+
+
+def test_iter_as_completed_stops_producers_when_consumer_raises():
+    before = threading.active_count()
+    
+    def consume():
+        for key, item in iter_as_completed({'a': iter(range(1000))}, buffer_size=1):
+            raise ValueError(item)
+    
+    with pytest.raises(ValueError):
+        consume()
+    deadline = time.monotonic() + 2
+    while threading.active_count() > before and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert threading.active_count() == before
@@ -0,0 +1,111 @@
+"""
+Tests for the adaptive describe engine
+"""
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError, ReadTimeoutError
+
+from scanners import describe_engine
+from scanners.describe_engine import AdaptiveLimit, DescribeEngine
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(describe_engine.time, 'sleep', lambda seconds: None)
+
+
+def _client_error(code):
+    return ClientError({'Error': {'Code': code}}, 'DescribeTrainingJob')
+
+
+def _failing(*errors, result='ok'):
+    """A call that raises each error in turn, then returns result"""
+    errors = list(errors)
+    calls = []
+    
+    def call(**kwargs):
+        calls.append(kwargs)
+        if errors:
+            raise errors.pop(0)
+        return result
+    return call, calls
+
+
+@pytest.mark.parametrize('error', [
+    _client_error('ThrottlingException'),
+    _client_error('InternalFailure'),
+    EndpointConnectionError(endpoint_url='https://api.sagemaker.us-east-1.amazonaws.com'),
+    ReadTimeoutError(endpoint_url='https://api.sagemaker.us-east-1.amazonaws.com')
+])
+def test_retries_throttles_transient_and_connection_errors(error):
+    engine = DescribeEngine(max_workers=2)
+    call, calls = _failing(error, error)
+    assert engine.call('DescribeTrainingJob', call, TrainingJobName='job') == 'ok'
+    assert len(calls) == 3
+    assert engine.get_stats()['DescribeTrainingJob']['calls'] == 3
+
+
+def test_does_not_retry_other_client_errors():
+    engine = DescribeEngine()
+    call, calls = _failing(_client_error('ValidationException'))
+    with pytest.raises(ClientError):
+        engine.call('DescribeTrainingJob', call)
+    assert len(calls) == 1
+
+
+def test_gives_up_after_max_retries():
+    engine = DescribeEngine(max_retries=2)
+    call, calls = _failing(*[_client_error('ThrottlingException')] * 5)
+    with pytest.raises(ClientError):
+        engine.call('DescribeTrainingJob', call)
+    assert len(calls) == 3
+    assert engine.get_stats()['DescribeTrainingJob']['throttles'] == 3
+
+
+def test_throttle_halves_limit_and_success_grows_it():
+    engine = DescribeEngine(max_workers=8)
+    call, _ = _failing(_client_error('ThrottlingException'))
+    engine.call('ListTrainingJobs', call)
+    limit = engine.limits['ListTrainingJobs']
+    # Halved once by the throttle, then grown by 1/limit on the retry's success
+    assert limit.limit == pytest.approx(4 + 1 / 4)
+
+
+def test_limit_stays_within_bounds():
+    limit = AdaptiveLimit(maximum=4)
+    for _ in range(10):
+        limit.acquire()
+        limit.release(succeeded=False, throttled=True)
+    assert limit.limit == 1
+    for _ in range(100):
+        limit.acquire()
+        limit.release()
+    assert limit.limit == 4
+
+
+def test_other_failures_leave_limit_unchanged():
+    limit = AdaptiveLimit(maximum=4)
+    limit.limit = 2.0
+    limit.acquire()
+    limit.release(succeeded=False)
+    assert limit.limit == 2.0
+    
+    engine = DescribeEngine(max_workers=4)
+    call, _ = _failing(_client_error('AccessDeniedException'))
+    with pytest.raises(ClientError):
+        engine.call('DescribeModel', call)
+    assert engine.limits['DescribeModel'].limit == 4
+
+
+def test_paginate_follows_next_token():
+    pages = {None: {'Items': [1, 2], 'NextToken': 'a'}, 'a': {'Items': [3]}}
+    engine = DescribeEngine()
+    items = engine.paginate('ListModels', lambda NextToken=None: pages[NextToken], 'Items')
+    assert list(items) == [1, 2, 3]
+    assert engine.get_stats()['ListModels']['calls'] == 2
+
+
+def test_map_keeps_input_order():
+    engine = DescribeEngine(max_workers=4)
+    assert list(engine.map(lambda n: n * 2, range(20))) == [n * 2 for n in range(20)]
+    engine.shutdown()
@@ -0,0 +1,62 @@
+"""
+Tests for the chunked HTML report
+"""
+
+import json
+import re
+
+from scanners.html_report import write_html_report
+
+
+def _results(findings_by_scanner, controls=None):
+    return {
+        'scan_metadata': {'timestamp': '2024-01-01T00:00:00', 'region': 'us-east-1', 'regions': {'us-east-1': {}}},
+        'findings_by_scanner': findings_by_scanner,
+        'summary': {
+            'total_findings': sum(len(findings) for findings in findings_by_scanner.values()),
+            'risk_score': 10,
+            'severity_breakdown': {'HIGH': 1},
+            'top_violated_controls': controls or {}
+        }
+    }
+
+
+def _script(page, element_id):
+    return re.search(f'<script type="application/json" id="{element_id}">(.*?)</script>', page, re.DOTALL).group(1)
+
+
+def test_finding_text_cannot_close_the_script_block(tmp_path):
+    output = tmp_path / 'report.html'
+    name = '</script><script>alert(1)</script>'
+    results = _results({'s3': [{'severity': 'HIGH', 'bucket_name': name, 'issue': '<b>bad</b>', 'control': 'C-1'}]})
+    
+    assert write_html_report(str(output), results) == 1
+    page = output.read_text()
+    assert '<script>alert(1)' not in page
+    rows = json.loads(_script(page, 'findings-data'))
+    lookups = json.loads(_script(page, 'findings-lookups'))
+    assert rows == [[0, 1, name, 0, 0]]
+    assert lookups['issues'] == ['<b>bad</b>']
+
+
+def test_header_text_is_escaped(tmp_path):
+    output = tmp_path / 'report.html'
+    results = _results({'iam': []}, controls={'<img src=x>': 3})
+    
+    write_html_report(str(output), results, title='Report <All>', badge='A&B', scan_mode='"mode"')
+    page = output.read_text()
+    assert '<title>Report &lt;All&gt;</title>' in page
+    assert 'A&amp;B' in page
+    assert '&quot;mode&quot;' in page
+    assert '<td>&lt;img src=x&gt;</td><td>3</td>' in page
+    assert '<img src=x>' not in page
+
+
+def test_findings_stream_across_chunks(tmp_path):
+    output = tmp_path / 'report.html'
+    findings = [('sagemaker', {'severity': 'LOW', 'resource_name': f'job-{i}', 'issue': 'i', 'control': 'c'})
+                for i in range(5)]
+    
+    assert write_html_report(str(output), _results({'sagemaker': []}), iter(findings), chunk_size=2) == 5
+    rows = json.loads(_script(output.read_text(), 'findings-data'))
+    assert [row[2] for row in rows] == [f'job-{i}' for i in range(5)]
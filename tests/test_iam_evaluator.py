@@ -0,0 +1,90 @@
+"""
+Tests for the offline IAM permission evaluator
+"""
+
+from scanners.iam_evaluator import ALLOW, EXPLICIT_DENY, IMPLICIT_DENY, PermissionEvaluator, RolePermissions
+
+BUCKET = 'arn:aws:s3:::training-data'
+CONDITION = {'Bool': {'aws:MultiFactorAuthPresent': 'true'}}
+
+
+def _permissions(*policies) -> RolePermissions:
+    """One policy per argument, each a list of statements"""
+    return RolePermissions([(f"policy-{i}", {'Statement': statements}) for i, statements in enumerate(policies)])
+
+
+def test_allow_and_implicit_deny():
+    permissions = _permissions([{'Effect': 'Allow', 'Action': 's3:Get*', 'Resource': BUCKET + '/*'}])
+    assert permissions.evaluate('s3:GetObject', BUCKET + '/model.tar.gz').decision == ALLOW
+    assert permissions.evaluate('s3:PutObject', BUCKET + '/model.tar.gz').decision == IMPLICIT_DENY
+    assert permissions.evaluate('s3:GetObject', 'arn:aws:s3:::other/key').decision == IMPLICIT_DENY
+    # With no resource, an Allow on some resource is enough
+    assert permissions.can('s3:GetObject')
+
+
+def test_deny_overrides_allow_across_policies():
+    permissions = _permissions(
+        [{'Effect': 'Allow', 'Action': '*', 'Resource': '*'}],
+        [{'Effect': 'Deny', 'Action': 's3:Delete*', 'Resource': BUCKET}]
+    )
+    decision = permissions.evaluate('s3:DeleteBucket', BUCKET)
+    assert decision.decision == EXPLICIT_DENY
+    assert [indexed.policy for indexed in decision.statements] == ['policy-1']
+    assert permissions.can('s3:DeleteBucket', 'arn:aws:s3:::other')
+
+
+def test_deny_without_resource_needs_every_resource():
+    permissions = _permissions([
+        {'Effect': 'Allow', 'Action': 's3:*', 'Resource': '*'},
+        {'Effect': 'Deny', 'Action': 's3:DeleteBucket', 'Resource': BUCKET}
+    ])
+    assert permissions.can('s3:DeleteBucket')
+    
+    permissions = _permissions([
+        {'Effect': 'Allow', 'Action': 's3:*', 'Resource': '*'},
+        {'Effect': 'Deny', 'Action': 's3:DeleteBucket', 'Resource': '*'}
+    ])
+    assert not permissions.can('s3:DeleteBucket')
+
+
+def test_not_action_and_not_resource():
+    permissions = _permissions([
+        {'Effect': 'Allow', 'NotAction': 'iam:*', 'Resource': '*'},
+        {'Effect': 'Deny', 'Action': 's3:*', 'NotResource': BUCKET + '/*'}
+    ])
+    assert not permissions.can('iam:PassRole')
+    assert permissions.can('sagemaker:CreateTrainingJob')
+    assert permissions.can('s3:GetObject', BUCKET + '/key')
+    assert permissions.evaluate('s3:GetObject', 'arn:aws:s3:::other/key').decision == EXPLICIT_DENY
+
+
+def test_conditional_allow_is_flagged():
+    permissions = _permissions([{'Effect': 'Allow', 'Action': 's3:GetObject', 'Resource': '*', 'Condition': CONDITION}])
+    decision = permissions.evaluate('s3:GetObject', BUCKET + '/key')
+    assert decision.decision == ALLOW and decision.conditional
+    
+    # An unconditional allow for the same action makes the result definite
+    permissions = _permissions(
+        [{'Effect': 'Allow', 'Action': 's3:GetObject', 'Resource': '*', 'Condition': CONDITION}],
+        [{'Effect': 'Allow', 'Action': 's3:*', 'Resource': '*'}]
+    )
+    assert not permissions.evaluate('s3:GetObject', BUCKET + '/key').conditional
+
+
+def test_conditional_deny_leaves_allow_conditional():
+    permissions = _permissions(
+        [{'Effect': 'Allow', 'Action': 's3:*', 'Resource': '*'}],
+        [{'Effect': 'Deny', 'Action': 's3:*', 'Resource': '*', 'Condition': CONDITION}]
+    )
+    decision = permissions.evaluate('s3:GetObject', BUCKET + '/key')
+    assert decision.decision == ALLOW and decision.conditional
+
+
+def test_roles_that_can():
+    evaluator = PermissionEvaluator({
+        'reader': [('inline', {'Statement': [{'Effect': 'Allow', 'Action': 's3:GetObject', 'Resource': '*'}]})],
+        'admin': [('inline', {'Statement': [{'Effect': 'Allow', 'Action': '*', 'Resource': '*'}]})],
+        'none': []
+    })
+    assert evaluator.roles_that_can('s3:GetObject', BUCKET + '/key') == ['admin', 'reader']
+    assert evaluator.roles_that_can('iam:PassRole') == ['admin']
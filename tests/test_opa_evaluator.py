@@ -0,0 +1,113 @@
+"""
+Tests for mapping scanner records to OPA policy inputs
+"""
+
+from datetime import datetime
+
+import boto3
+
+from scanners import SageMakerScanner
+from scanners.opa_evaluator import strip_response_metadata, to_policy_inputs
+
+
+def test_notebook_input_drops_missing_fields():
+    [document] = to_policy_inputs('AWS::SageMaker::NotebookInstance', {
+        'NotebookInstanceName': 'nb',
+        'RootAccess': 'Enabled',
+        'Tags': [{'Key': 'DataClassification', 'Value': 'Confidential'}]
+    })
+    assert document['notebook_name'] == 'nb'
+    assert document['data_classification'] == 'Confidential'
+    # A null field would count as defined in Rego
+    assert 'kms_key_id' not in document
+    assert 'subnet_id' not in document
+
+
+def test_role_input_per_policy_with_normalized_statements():
+    record = {
+        'RoleName': 'r',
+        'Arn': 'arn:aws:iam::123456789012:role/r',
+        'AssumeRolePolicyDocument': {'Statement': {
+            'Effect': 'Allow', 'Principal': {'Service': 'sagemaker.amazonaws.com'}, 'Action': 'sts:AssumeRole'
+        }},
+        'RoleLastUsed': {'LastUsedDate': datetime(2024, 1, 2)},
+        'Policies': [
+            ('inline', {'Statement': [{'Effect': 'Allow', 'Action': 's3:*', 'Resource': '*'}]}),
+            ('arn:aws:iam::aws:policy/ReadOnlyAccess', {'Statement': []})
+        ]
+    }
+    documents = to_policy_inputs('AWS::IAM::Role', record)
+    assert [document['policy_name'] for document in documents] == ['inline', 'arn:aws:iam::aws:policy/ReadOnlyAccess']
+    first = documents[0]
+    assert first['account_id'] == '123456789012'
+    assert first['last_used_date'] == '2024-01-02T00:00:00'
+    assert first['policy_document']['Statement'][0]['Action'] == ['s3:*']
+    trust = first['assume_role_policy']['Statement'][0]
+    assert trust['Action'] == ['sts:AssumeRole']
+    assert trust['Principal'] == {'Service': ['sagemaker.amazonaws.com']}
+
+
+def test_role_without_policies_has_no_inputs():
+    assert to_policy_inputs('AWS::IAM::Role', {'RoleName': 'r', 'Arn': 'arn:aws:iam::1:role/r'}) == []
+
+
+def test_bucket_input_from_metadata():
+    [document] = to_policy_inputs('AWS::S3::Bucket', {
+        'Name': 'sagemaker-data',
+        'Region': 'eu-west-1',
+        'TagSet': [],
+        'Encryption': {'ServerSideEncryptionConfiguration': {}},
+        'Versioning': {'Status': 'Enabled'},
+        'Lifecycle': {'Rules': [{'Expiration': {'Days': 30}}, {}]},
+        'PublicAccessBlock': {'PublicAccessBlockConfiguration': {'BlockPublicAcls': True}},
+        'Unknown': []
+    })
+    assert document['sagemaker_usage'] is True
+    assert document['encryption_enabled'] is True
+    assert document['versioning_enabled'] is True
+    assert document['lifecycle_rules'] == [{'expiration_days': 30}, {}]
+    assert document['public_access_block'] == {'block_public_acls': True}
+    assert 'unknown_attributes' not in document
+
+
+def test_bucket_input_names_unreadable_attributes():
+    [document] = to_policy_inputs('AWS::S3::Bucket', {
+        'Name': 'data',
+        'Region': 'us-east-1',
+        'TagSet': [],
+        'Encryption': None,
+        'Unknown': ['Encryption', 'Versioning']
+    })
+    # Left out rather than reported as disabled
+    assert 'encryption_enabled' not in document
+    assert 'versioning_enabled' not in document
+    assert document['unknown_attributes'] == ['encryption_enabled', 'versioning_enabled']
+
+
+def test_unmapped_resource_type_has_no_inputs():
+    assert to_policy_inputs('AWS::Lambda::Function', {'FunctionName': 'f'}) == []
+
+
+def test_strip_response_metadata_keeps_the_record():
+    response = {'Status': 'Enabled', 'ResponseMetadata': {'HTTPStatusCode': 200}}
+    assert strip_response_metadata(response) == {'Status': 'Enabled'}
+    assert 'ResponseMetadata' in response
+
+
+def test_scanner_keeps_records_only_when_collecting(aws):
+    boto3.client('sagemaker', region_name='us-east-1').create_model(
+        ModelName='model',
+        ExecutionRoleArn='arn:aws:iam::123456789012:role/sagemaker',
+        PrimaryContainer={'Image': 'image'}
+    )
+    default = SageMakerScanner(inventory='describe')
+    default.scan_models()
+    assert default.findings
+    assert default.resource_records == []
+    
+    collecting = SageMakerScanner(inventory='describe', collect_records=True)
+    collecting.scan_models()
+    [(resource_type, record)] = collecting.resource_records
+    assert resource_type == 'AWS::SageMaker::Model'
+    assert record['ModelName'] == 'model'
+    assert 'ResponseMetadata' not in record
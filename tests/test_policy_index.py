@@ -0,0 +1,62 @@
+"""
+Tests for compiled policy statements and wildcard action matching
+"""
+
+from scanners.policy_index import ActionMatcher, compile_policy, wildcard_regex
+
+CATALOG = ['iam:PassRole', 'iam:CreateAccessKey', 'iam:PutRolePolicy', 's3:DeleteBucket', 's3:PutBucketPolicy']
+
+
+def _statement(**fields):
+    return compile_policy({'Statement': {'Effect': 'Allow', 'Resource': '*', **fields}})[0]
+
+
+def test_wildcard_regex_star_and_question_mark():
+    assert wildcard_regex('iam:Put*').match('iam:PutRolePolicy')
+    assert wildcard_regex('iam:?assRole').match('iam:PassRole')
+    assert not wildcard_regex('iam:?assRole').match('iam:BypassRole')
+    assert not wildcard_regex('iam:Pass').match('iam:PassRole')
+
+
+def test_wildcard_regex_case_sensitivity():
+    # Actions are case-insensitive, resource ARNs are not
+    assert wildcard_regex('IAM:passrole').match('iam:PassRole')
+    assert not wildcard_regex('arn:aws:s3:::Bucket/*', False).match('arn:aws:s3:::bucket/key')
+
+
+def test_wildcard_regex_escapes_regex_characters():
+    assert wildcard_regex('arn:aws:s3:::my.bucket/*', False).match('arn:aws:s3:::my.bucket/a')
+    assert not wildcard_regex('arn:aws:s3:::my.bucket/*', False).match('arn:aws:s3:::myxbucket/a')
+
+
+def test_match_wildcards_and_literals_against_catalog():
+    matcher = ActionMatcher(CATALOG)
+    assert matcher.match('iam:*') == ['iam:PassRole', 'iam:CreateAccessKey', 'iam:PutRolePolicy']
+    assert matcher.match('s3:Put*') == ['s3:PutBucketPolicy']
+    # Literal patterns are looked up case-insensitively and reported in catalog case
+    assert matcher.match('IAM:PASSROLE') == ['iam:PassRole']
+    assert matcher.match('iam:GetRole') == []
+
+
+def test_granted_keeps_catalog_order():
+    matcher = ActionMatcher(CATALOG)
+    statement = _statement(Action=['s3:DeleteBucket', 'iam:PassRole'])
+    assert matcher.granted(statement) == ['iam:PassRole', 's3:DeleteBucket']
+
+
+def test_granted_not_action_covers_everything_else():
+    matcher = ActionMatcher(CATALOG)
+    assert matcher.granted(_statement(NotAction='iam:*')) == ['s3:DeleteBucket', 's3:PutBucketPolicy']
+    assert matcher.granted(_statement(NotAction=['s3:Delete*', 'iam:P*'])) == [
+        'iam:CreateAccessKey', 's3:PutBucketPolicy'
+    ]
+
+
+def test_compile_policy_normalizes_fields():
+    statement = compile_policy({'Statement': {
+        'Effect': 'Deny', 'Action': 's3:*', 'NotResource': 'arn:aws:s3:::logs', 'Condition': {'Bool': {}}
+    }})[0]
+    assert statement.actions == ('s3:*',)
+    assert statement.resources == ()
+    assert statement.not_resources == ('arn:aws:s3:::logs',)
+    assert statement.has_condition and not statement.is_allow
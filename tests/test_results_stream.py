@@ -0,0 +1,68 @@
+"""
+Tests for NDJSON scan results
+"""
+
+import gzip
+import json
+
+import pytest
+
+from scanners.results_stream import ResultsWriter, iter_findings, load_results
+
+RESULTS = {
+    'scan_metadata': {'region': 'us-east-1', 'scanners': {'sagemaker': {}, 'iam': {}, 's3': {}}},
+    'summary': {'total_findings': 3}
+}
+
+
+def _write(path, close_with_results=True):
+    with ResultsWriter(path) as writer:
+        writer.write_finding('s3', {'bucket_name': 'b1', 'severity': 'HIGH'})
+        writer.write_finding('iam', {'role_name': 'r1', 'severity': 'LOW'})
+        writer.write_finding('s3', {'bucket_name': 'b2', 'severity': 'MEDIUM'})
+        if close_with_results:
+            writer.close(RESULTS)
+
+
+@pytest.mark.parametrize('name', ['results.ndjson', 'results.ndjson.gz'])
+def test_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+    _write(path)
+    
+    results = load_results(path)
+    # Regrouped in scan metadata order, with scanners that found nothing kept
+    assert list(results['findings_by_scanner']) == ['sagemaker', 'iam', 's3']
+    assert [f['bucket_name'] for f in results['findings_by_scanner']['s3']] == ['b1', 'b2']
+    assert len(results['consolidated_findings']) == 3
+    assert results['summary'] == {'total_findings': 3}
+    assert results['scan_metadata'] == RESULTS['scan_metadata']
+    assert [scanner for scanner, _ in iter_findings(path)] == ['s3', 'iam', 's3']
+
+
+def test_gzip_output_is_compressed(tmp_path):
+    path = str(tmp_path / 'results.ndjson.gz')
+    _write(path)
+    
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['type'] for record in records] == ['finding'] * 3 + ['summary']
+    assert records[-1]['findings_written'] == 3
+
+
+def test_missing_summary_still_loads_findings(tmp_path, capsys):
+    path = str(tmp_path / 'results.ndjson.gz')
+    _write(path, close_with_results=False)
+    
+    results = load_results(path)
+    assert 'no summary record' in capsys.readouterr().out
+    assert 'summary' not in results
+    assert list(results['findings_by_scanner']) == ['s3', 'iam']
+    assert len(results['consolidated_findings']) == 3
+
+
+def test_loads_legacy_json_export(tmp_path):
+    path = tmp_path / 'results.json'
+    legacy = {**RESULTS, 'findings_by_scanner': {'s3': [{'bucket_name': 'b1'}]}, 'consolidated_findings': [{'bucket_name': 'b1'}]}
+    path.write_text(json.dumps(legacy))
+    
+    assert load_results(str(path)) == legacy
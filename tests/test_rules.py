@@ -0,0 +1,29 @@
+"""
+Tests for the rule catalog and compact findings
+"""
+
+from scanners.rules import RULES, Finding
+
+
+def test_to_dict_expands_rule_metadata():
+    finding = Finding('sagemaker.notebook.kms', 'nb', 'arn:aws:sagemaker:us-east-1:123456789012:notebook-instance/nb',
+                      region='us-east-1', timestamp='2024-01-01T00:00:00')
+    rule = RULES['sagemaker.notebook.kms']
+    
+    assert finding.to_dict() == {
+        'rule_id': 'sagemaker.notebook.kms',
+        'resource_type': 'AWS::SageMaker::NotebookInstance',
+        'resource_name': 'nb',
+        'resource_arn': 'arn:aws:sagemaker:us-east-1:123456789012:notebook-instance/nb',
+        'severity': rule.severity,
+        'issue': rule.issue,
+        'control': rule.control,
+        'remediation': rule.remediation,
+        'timestamp': '2024-01-01T00:00:00',
+        'region': 'us-east-1'
+    }
+
+
+def test_to_dict_fills_issue_placeholders_from_detail():
+    finding = Finding('s3.bucket.required_tags', 'bucket', detail={'tags': 'Owner, Purpose'})
+    assert finding.to_dict()['issue'] == 'Missing required tags: Owner, Purpose'
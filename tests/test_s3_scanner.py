@@ -0,0 +1,78 @@
+"""
+Tests for the S3 bucket scanner
+"""
+
+import boto3
+
+from scanners import S3Scanner
+from scanners.s3_scanner import PUBLIC_ACCESS_FLAGS
+
+ACCOUNT_ID = '123456789012'
+
+
+def _create_buckets(names, blocked=()):
+    s3 = boto3.client('s3', region_name='us-east-1')
+    for name in names:
+        s3.create_bucket(Bucket=name)
+        if name in blocked:
+            s3.put_public_access_block(Bucket=name, PublicAccessBlockConfiguration=blocked[name])
+
+
+def _block_account(**flags):
+    boto3.client('s3control', region_name='us-east-1').put_public_access_block(
+        AccountId=ACCOUNT_ID, PublicAccessBlockConfiguration=flags
+    )
+
+
+def _public_access_issues(scanner):
+    return sorted(
+        (f.bucket_name, f.rule_id) for f in scanner.scan_all()
+        if f.rule_id in ('s3.bucket.public_access', 's3.bucket.no_public_access_block')
+    )
+
+
+def test_account_block_skips_bucket_public_access_checks(aws):
+    _create_buckets(['sagemaker-a', 'sagemaker-b'])
+    _block_account(**{flag: True for flag in PUBLIC_ACCESS_FLAGS})
+    
+    scanner = S3Scanner()
+    assert _public_access_issues(scanner) == []
+    assert scanner.scan_metadata['account_public_access_block']['bucket_checks_skipped'] == 2
+    # Only the account-level call: no bucket was asked for its own block
+    assert scanner.get_api_calls()['GetPublicAccessBlock'] == 1
+
+
+def test_account_and_bucket_flags_combine(aws):
+    _create_buckets(['sagemaker-covered', 'sagemaker-partial', 'sagemaker-none'], blocked={
+        'sagemaker-covered': {'BlockPublicPolicy': True, 'RestrictPublicBuckets': True},
+        'sagemaker-partial': {'BlockPublicPolicy': True}
+    })
+    _block_account(BlockPublicAcls=True, IgnorePublicAcls=True)
+    
+    scanner = S3Scanner()
+    # A bucket without its own block is still partly covered by the account flags
+    assert _public_access_issues(scanner) == [
+        ('sagemaker-none', 's3.bucket.public_access'),
+        ('sagemaker-partial', 's3.bucket.public_access')
+    ]
+    assert scanner.scan_metadata['account_public_access_block']['bucket_checks_skipped'] == 0
+
+
+def test_no_blocks_anywhere(aws):
+    _create_buckets(['sagemaker-open'])
+    
+    assert _public_access_issues(S3Scanner()) == [('sagemaker-open', 's3.bucket.no_public_access_block')]
+
+
+def test_resource_records_leave_out_response_metadata(aws):
+    _create_buckets(['sagemaker-a'])
+    boto3.client('s3', region_name='us-east-1').put_bucket_versioning(
+        Bucket='sagemaker-a', VersioningConfiguration={'Status': 'Enabled'}
+    )
+    
+    scanner = S3Scanner()
+    scanner.scan_all()
+    [(resource_type, record)] = scanner.get_resource_records()
+    assert resource_type == 'AWS::S3::Bucket'
+    assert record['Versioning'] == {'Status': 'Enabled'}
+    assert not any('ResponseMetadata' in (record.get(field) or {}) for field in ('Encryption', 'Versioning'))
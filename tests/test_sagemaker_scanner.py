@@ -0,0 +1,99 @@
+"""
+Tests for the SageMaker scanner's incremental training job scans
+"""
+
+import boto3
+import pytest
+
+from scanners import SageMakerScanner
+from scanners import sagemaker_scanner
+from scanners.state_store import LocalStateStore
+
+
+def _create_job(name):
+    boto3.client('sagemaker', region_name='us-east-1').create_training_job(
+        TrainingJobName=name,
+        AlgorithmSpecification={'TrainingImage': 'image', 'TrainingInputMode': 'File'},
+        RoleArn='arn:aws:iam::123456789012:role/sagemaker',
+        OutputDataConfig={'S3OutputPath': 's3://bucket/output'},
+        ResourceConfig={'InstanceType': 'ml.m5.large', 'InstanceCount': 1, 'VolumeSizeInGB': 10},
+        StoppingCondition={'MaxRuntimeInSeconds': 60}
+    )
+
+
+def _scan(store):
+    scanner = SageMakerScanner(state_store=store, inventory='describe')
+    scanner.scan_training_jobs()
+    return scanner
+
+
+def _jobs(scanner):
+    return sorted({finding.resource_name for finding in scanner.findings})
+
+
+@pytest.fixture
+def store(aws, tmp_path):
+    return LocalStateStore(str(tmp_path))
+
+
+def test_later_scans_carry_forward_earlier_verdicts(store):
+    for name in ('job-a', 'job-b'):
+        _create_job(name)
+    first = _scan(store)
+    assert first.scan_metadata['training_jobs_incremental']['jobs_checked'] == 2
+    
+    _create_job('job-c')
+    second = _scan(store)
+    stats = second.scan_metadata['training_jobs_incremental']
+    assert _jobs(second) == ['job-a', 'job-b', 'job-c']
+    assert len(second.findings) == len(first.findings) * 3 // 2
+    # Only jobs from the watermark on are described again
+    assert stats['jobs_checked'] + stats['verdicts_carried_forward'] == 3
+    assert stats['jobs_checked'] < 3
+
+
+def test_failed_listing_still_reports_carried_verdicts(store, monkeypatch):
+    _create_job('job-a')
+    _scan(store)
+    saved = store.get('training-jobs#123456789012#us-east-1')
+    
+    def fail(*args, **kwargs):
+        raise RuntimeError('listing failed')
+    monkeypatch.setattr(SageMakerScanner, '_training_job_records', fail)
+    scanner = _scan(store)
+    
+    assert _jobs(scanner) == ['job-a']
+    assert scanner.scan_metadata['training_jobs_incremental']['error'] == 'listing failed'
+    assert store.get('training-jobs#123456789012#us-east-1') == saved
+
+
+def test_verdicts_past_retention_are_dropped(store, monkeypatch):
+    _create_job('job-a')
+    _scan(store)
+    
+    monkeypatch.setattr(sagemaker_scanner, 'TRAINING_JOB_VERDICT_DAYS', -1)
+    monkeypatch.setattr(SageMakerScanner, '_training_job_records', lambda self, created_after=None: iter([]))
+    scanner = _scan(store)
+    
+    assert scanner.findings == []
+    assert scanner.scan_metadata['training_jobs_incremental']['verdicts_expired'] == 1
+    assert store.get('training-jobs#123456789012#us-east-1')['verdicts'] == {}
+
+
+def test_jobs_that_fail_to_describe_are_retried_and_not_counted(store, monkeypatch):
+    _create_job('job-a')
+    describe = SageMakerScanner._describe_training_job
+    monkeypatch.setattr(SageMakerScanner, '_describe_training_job', lambda self, name: None)
+    first = _scan(store)
+    assert first.scan_metadata['training_jobs_incremental']['jobs_checked'] == 0
+    assert store.get('training-jobs#123456789012#us-east-1')['pending'] == ['job-a']
+    
+    # Failing again on the retry still isn't a check, and the job is queued once
+    second = _scan(store)
+    assert second.scan_metadata['training_jobs_incremental']['jobs_checked'] == 0
+    assert store.get('training-jobs#123456789012#us-east-1')['pending'] == ['job-a']
+    
+    monkeypatch.setattr(SageMakerScanner, '_describe_training_job', describe)
+    third = _scan(store)
+    assert _jobs(third) == ['job-a']
+    assert third.scan_metadata['training_jobs_incremental']['pending'] == 0